@@ -0,0 +1,144 @@
+"""
+Command line entry point.
+
+    python -m autocropper                 # open the GUI (same as app.py)
+    python -m autocropper crop --input DIR [--output DIR] [--jobs N] [--resume]
+
+The crop command runs the same engine as the GUI's Run Cropper button
+(pipeline.crop_folder) without Tk, then normalizes output filenames like the
+GUI does before review. Progress is written to stdout as JSON lines:
+
+    {"event": "start", "input": ..., "output": ..., "total": N, "skipped_lots": [...]}
+    {"event": "progress", "done": k, "total": N, "file": ..., "elapsed": s, "images_per_sec": r}
+    {"event": "summary", "done": k, "total": N, "seconds": s, "images_per_sec": r,
+     "renamed": n, "cancelled": false, "stages": {...}, "queues": {...}}
+
+"stages" holds per-stage timings (decode, inference, postprocess, encode) from
+runtime.progress; the same metrics are saved to crop_metrics.json in the
+output folder.
+
+Log lines from the cropper go to stderr so stdout stays machine-readable.
+Ctrl-C stops after in-flight crops are written (exit code 130).
+"""
+import argparse
+import contextlib
+import json
+import multiprocessing
+import os
+import sys
+import threading
+import time
+
+from autocropper.cropper import BATCH_SIZE
+from autocropper.io_utils import FolderIndex, compute_already_cropped_lots, normalize_output_dir
+from autocropper.pipeline import DECODE_QUEUE_DEPTH, WRITE_QUEUE_DEPTH, list_image_files, crop_folder
+from autocropper.renames import recover_renames
+from autocropper.runtime import progress, stop_event
+
+
+def _emit(stream, event, **fields):
+    stream.write(json.dumps({"event": event, **fields}) + "\n")
+    stream.flush()
+
+
+def _default_output_dir(input_dir):
+    # Same convention as the GUI: sibling folder named Cropped_<input folder>
+    input_dir = os.path.abspath(input_dir)
+    return os.path.join(os.path.dirname(input_dir), f"Cropped_{os.path.basename(input_dir)}")
+
+
+def crop_command(args, out=sys.stdout):
+    in_dir = os.path.abspath(args.input)
+    if not os.path.isdir(in_dir):
+        print(f"Input folder not found: {in_dir}", file=sys.stderr)
+        return 2
+    out_dir = os.path.abspath(args.output) if args.output else _default_output_dir(in_dir)
+    os.makedirs(out_dir, exist_ok=True)
+    # Files of an interrupted rename batch are back under lot names first
+    recover_renames(out_dir)
+
+    # The input is listed once: resume, the file list and sharding share it
+    in_index = FolderIndex(in_dir)
+
+    # --resume: skip lots whose images are all present in the output already
+    skip_lots = compute_already_cropped_lots(in_index, out_dir, include_reviewed=False) if args.resume else set()
+    image_files = list_image_files(in_index, skip_lots)
+    _emit(out, "start", input=in_dir, output=out_dir, total=len(image_files),
+          jobs=args.jobs, skipped_lots=sorted(skip_lots))
+
+    worker = threading.Thread(
+        target=crop_folder,
+        args=(in_index, out_dir, image_files),
+        kwargs=dict(
+            batch_size=args.batch_size,
+            decode_depth=args.decode_depth,
+            write_depth=args.write_depth,
+            jobs=args.jobs,
+            log_to_stderr=True,
+        ),
+        daemon=True,
+    )
+
+    start = time.perf_counter()
+    last = None
+    # Cropper log prints go to stderr; JSON goes to the saved stdout stream
+    with contextlib.redirect_stdout(sys.stderr):
+        worker.start()
+        while worker.is_alive():
+            try:
+                worker.join(args.interval)
+            except KeyboardInterrupt:
+                stop_event.set()
+                continue
+            state = (progress.current, progress.current_file)
+            if state != last:
+                last = state
+                elapsed = time.perf_counter() - start
+                _emit(out, "progress", done=progress.current, total=len(image_files),
+                      file=os.path.basename(progress.current_file or ""),
+                      elapsed=round(elapsed, 3),
+                      images_per_sec=round(progress.current / elapsed, 3) if elapsed else 0.0)
+
+        seconds = time.perf_counter() - start
+        renamed = 0 if stop_event.is_set() else normalize_output_dir(out_dir)
+
+    snap = progress.snapshot()
+    _emit(out, "summary", done=progress.current, total=len(image_files),
+          seconds=round(seconds, 3),
+          images_per_sec=round(progress.current / seconds, 3) if seconds else 0.0,
+          renamed=renamed, cancelled=stop_event.is_set(),
+          stages=snap["stages"], queues=snap["queues"])
+    return 130 if stop_event.is_set() else 0
+
+
+def build_parser():
+    ap = argparse.ArgumentParser(prog="python -m autocropper", description="BD Auctions lot auto-cropper")
+    sub = ap.add_subparsers(dest="command")
+
+    sub.add_parser("gui", help="open the GUI (default)")
+
+    crop = sub.add_parser("crop", help="crop a folder headlessly")
+    crop.add_argument("--input", required=True, help="folder of exported lot images")
+    crop.add_argument("--output", help="output folder (default: Cropped_<input> next to the input)")
+    crop.add_argument("--jobs", type=int, default=1, help="worker processes, each with its own model (default 1)")
+    crop.add_argument("--resume", action="store_true", help="skip lots already fully present in the output")
+    crop.add_argument("--batch-size", type=int, default=BATCH_SIZE, help="images per predict call")
+    crop.add_argument("--decode-depth", type=int, default=DECODE_QUEUE_DEPTH, help="decoded images queued ahead")
+    crop.add_argument("--write-depth", type=int, default=WRITE_QUEUE_DEPTH, help="crops queued for writing")
+    crop.add_argument("--interval", type=float, default=1.0, help="seconds between progress lines")
+    return ap
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    if args.command == "crop":
+        return crop_command(args)
+
+    from autocropper.app import main as gui_main
+    gui_main()
+    return 0
+
+
+if __name__ == "__main__":
+    multiprocessing.freeze_support()
+    sys.exit(main())
@@ -1,3 +1,4 @@
+import multiprocessing
 import tkinter as tk
 import sv_ttk
 from autocropper.runtime import on_root_close, stop_event
@@ -12,4 +13,6 @@ def main():
     root.mainloop()
 
 if __name__ == "__main__":
+    # Needed for process-pool cropping in frozen (PyInstaller) builds
+    multiprocessing.freeze_support()
     main()
\ No newline at end of file
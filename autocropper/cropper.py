@@ -1,73 +1,393 @@
 import os
+import sqlite3
 import cv2
 import numpy as np
-from autocropper.model import get_model
+from PIL import Image
+from autocropper.model import get_model, model_state, MODEL_FILENAME
+from autocropper.detection_cache import get_cache
+from autocropper.lossless import crop_jpeg
 
-# Auto cropping function which loads image from the folder, predicts
-# the location of objects and combines all boxes into one rectangle
-def auto_crop_detected_objects(image_path, output_path):
-    # Load the model
-    model = get_model()
+# Predict settings shared by the single-image and batched paths. device and
+# half are for a GPU; predict_images switches them when the model is on CPU
+PREDICT_KWARGS = dict(
+    device=0,          # or 'cuda'/'cpu'
+    workers=0,         # safer with tkinter on Windows
+    imgsz=4800,
+    conf=2e-3,
+    iou=0.3,
+    max_det=300,
+    agnostic_nms=True,
+    half=True,
+    amp=False,
+    verbose=True,
+)
 
+# Default number of images handed to the model per predict call
+BATCH_SIZE = 4
+
+# Decode an image from disk (BGR array), or None if it can't be read
+def decode_image(image_path):
     image = cv2.imread(image_path)
     if image is None:
         print(f"Failed to load {image_path}")
-        return
+    return image
+
+# Reduced-size JPEG decoding for the detection input. libjpeg scales by 1/2,
+# 1/4 or 1/8 inside the IDCT, which is far cheaper in time and memory than a
+# full decode. The largest reduction that keeps the long side >= the
+# detection imgsz is used; boxes are mapped back to full resolution and the
+# full-size image is only decoded when its crop is written (save_crop).
+REDUCED_DECODE = True
+_REDUCED_FLAGS = (
+    (8, cv2.IMREAD_REDUCED_COLOR_8),
+    (4, cv2.IMREAD_REDUCED_COLOR_4),
+    (2, cv2.IMREAD_REDUCED_COLOR_2),
+)
+
+# Full-size (h, w, 3) of an image from its header, as cv2.imread would
+# return it (EXIF rotations applied), or None if the header can't be read
+def image_shape(image_path):
+    try:
+        with Image.open(image_path) as im:
+            w, h = im.size
+            # Orientations 5-8 are transposed; cv2.imread applies them
+            if im.getexif().get(0x0112, 1) in (5, 6, 7, 8):
+                w, h = h, w
+        return (h, w, 3)
+    except Exception:
+        return None
+
+# Decode the detection input for an image: returns (image, full_shape) where
+# image may be a DCT-reduced decode and full_shape is the shape of the
+# full-resolution image; image is None when the file can't be read
+def decode_for_detection(image_path, imgsz=None):
+    if imgsz is None:
+        imgsz = COARSE_IMGSZ if ADAPTIVE_RESOLUTION else PREDICT_KWARGS["imgsz"]
+    if REDUCED_DECODE and image_path.lower().endswith((".jpg", ".jpeg")):
+        full_shape = image_shape(image_path)
+        if full_shape is not None:
+            for factor, flag in _REDUCED_FLAGS:
+                if max(full_shape[:2]) / factor >= imgsz:
+                    image = cv2.imread(image_path, flag)
+                    if image is not None:
+                        return image, full_shape
+                    break
+    image = decode_image(image_path)
+    return image, (image.shape if image is not None else None)
+
+# True when image is a reduced decode rather than the full-size image
+def _is_reduced(image, full_shape):
+    return full_shape is not None and tuple(image.shape[:2]) != tuple(full_shape[:2])
+
+# Scale boxes detected on image to the coordinates of full_shape
+def _to_full_resolution(boxes, image, full_shape):
+    if boxes is None or not len(boxes) or not _is_reduced(image, full_shape):
+        return boxes
+    sx = full_shape[1] / image.shape[1]
+    sy = full_shape[0] / image.shape[0]
+    return boxes * np.array([sx, sy, sx, sy], dtype=boxes.dtype)
+
+# Coarse-to-fine detection. Every image is first detected at COARSE_IMGSZ;
+# only images whose coarse union box looks uncertain are re-run at the full
+# PREDICT_KWARGS["imgsz"]. Set ADAPTIVE_RESOLUTION = False for the fixed path.
+ADAPTIVE_RESOLUTION = True
+COARSE_IMGSZ = 1280
+MIN_CONFIDENT_BOXES = 2      # fewer boxes above min_area -> escalate
+BORDER_TOLERANCE = 0.01      # union within 1% of an edge "touches" the border
+FULL_FRAME_FRACTION = 0.90   # union covering >= 90% of the frame -> escalate
 
-    # Predict the boxes for the image
+# Boxes smaller than this fraction of the image area are ignored
+MIN_AREA_FRACTION = 0.0026
+
+# Reuse raw detections stored in the output folder (see detection_cache.py)
+USE_DETECTION_CACHE = True
+
+# Cut JPEG crops losslessly with jpegtran when available (see lossless.py);
+# boxes are widened to the JPEG's MCU grid (at most 15 px per edge)
+LOSSLESS_JPEG = True
+
+# Run one predict call over a list of sources (paths or decoded images)
+# and return one result per source (None when the call failed)
+def predict_images(model, sources, imgsz=None):
+    kwargs = dict(PREDICT_KWARGS)
+    if model_state.device == "cpu":
+        # CPU-only machine: ultralytics rejects device=0, and fp16 is GPU-only
+        kwargs.update(device="cpu", half=False)
+    if imgsz is not None:
+        kwargs["imgsz"] = imgsz
     try:
-        results = model.predict(
-            image_path,
-            device=0,          # or 'cuda'/'cpu'
-            workers=0,         # safer with tkinter on Windows
-            imgsz=4800,
-            conf=2e-3,
-            iou=0.3,
-            max_det=300,
-            agnostic_nms=True,
-            half=True,
-            amp=False,
-            verbose=True
-        )[0]
+        return list(model.predict(sources, **kwargs))
     except Exception as e:
         print("YOLO predict error:", e)
-        results = None
+        return [None] * len(sources)
 
-    # Check for empty result
-    if not results or results.boxes is None or len(results.boxes) == 0:
-        print(f"No objects detected in {image_path}")
-        cv2.imwrite(output_path, image)
-        return
+# Pull the raw xyxy boxes out of a result: (N, 4) float array,
+# empty when nothing was detected, None when predict failed
+def _result_boxes(results):
+    if results is None:
+        return None
+    if results.boxes is None or len(results.boxes) == 0:
+        return np.empty((0, 4), dtype=np.float32)
+    return results.boxes.xyxy.cpu().numpy()[:, :4]
+
+# Stack per-image box arrays into one flat (sum N, 4) array plus offsets,
+# so that image i owns rows offsets[i]:offsets[i + 1]. None counts as empty.
+def stack_boxes(boxes_list):
+    arrays = [
+        np.asarray(b, dtype=np.float32)[:, :4] if b is not None and len(b)
+        else np.empty((0, 4), dtype=np.float32)
+        for b in boxes_list
+    ]
+    offsets = np.zeros(len(arrays) + 1, dtype=np.intp)
+    np.cumsum([len(a) for a in arrays], out=offsets[1:])
+    flat = np.concatenate(arrays) if arrays else np.empty((0, 4), dtype=np.float32)
+    return flat, offsets
+
+# Vectorized area filter + union over a ragged batch of detections.
+# flat/offsets as from stack_boxes, shapes[i] is image i's (h, w, ...).
+# Returns (unions, n_valid): unions[i] is the (x1, y1, x2, y2) union of the
+# boxes of image i with area >= MIN_AREA_FRACTION of that image (NaN when
+# none qualify) and n_valid[i] is how many boxes qualified.
+def union_boxes_ragged(flat, offsets, shapes):
+    counts = np.diff(offsets)
+    unions = np.full((len(counts), 4), np.nan)
+    n_valid = np.zeros(len(counts), dtype=np.intp)
+    if not len(flat):
+        return unions, n_valid
+
+    img_area = np.array([sh[0] * sh[1] for sh in shapes], dtype=np.float64)
+    min_area = np.repeat(MIN_AREA_FRACTION * img_area, counts)
+    area = (flat[:, 2] - flat[:, 0]) * (flat[:, 3] - flat[:, 1])
+    valid = area >= min_area
+
+    # Invalid boxes become neutral elements of the min/max reductions
+    lo = np.where(valid[:, None], flat[:, :2], np.inf)
+    hi = np.where(valid[:, None], flat[:, 2:4], -np.inf)
+
+    # reduceat needs strictly increasing starts, so skip images with no boxes
+    has_boxes = counts > 0
+    starts = offsets[:-1][has_boxes]
+    n_valid[has_boxes] = np.add.reduceat(valid, starts)
+    unions[has_boxes, :2] = np.minimum.reduceat(lo, starts, axis=0)
+    unions[has_boxes, 2:] = np.maximum.reduceat(hi, starts, axis=0)
+    unions[n_valid == 0] = np.nan
+    return unions, n_valid
+
+# Decide, for a batch of coarse detections, which images need the
+# high-resolution pass: predict failed, too few usable boxes, or a union
+# touching the border or covering most of the frame
+def _needs_full_resolution(boxes_list, shapes):
+    unions, n_valid = union_boxes_ragged(*stack_boxes(boxes_list), shapes)
+    hw = np.array([sh[:2] for sh in shapes], dtype=np.float64).reshape(-1, 2)
+    h, w = hw[:, 0], hw[:, 1]
+    tol_x, tol_y = BORDER_TOLERANCE * w, BORDER_TOLERANCE * h
+    x1, y1, x2, y2 = unions.T
+
+    with np.errstate(invalid="ignore"):
+        border = (x1 <= tol_x) | (y1 <= tol_y) | (x2 >= w - tol_x) | (y2 >= h - tol_y)
+        full_frame = (x2 - x1) * (y2 - y1) >= FULL_FRAME_FRACTION * w * h
+    failed = np.array([b is None for b in boxes_list], dtype=bool)
+    return failed | (n_valid < MIN_CONFIDENT_BOXES) | border | full_frame
 
-    boxes = results.boxes.xyxy.cpu().numpy()
+# Detect boxes for a list of decoded images, one box array (or None on
+# predict failure) per image. Uses the coarse-to-fine path when enabled.
+# With full_shapes (see decode_for_detection) boxes are returned in
+# full-resolution coordinates, and reduced images that need the
+# high-resolution pass are decoded full size from sources. That decode
+# replaces the entry in images (the list is updated in place) so the writer
+# reuses it instead of decoding the file a third time.
+def detect_boxes(model, images, full_shapes=None, sources=None):
+    full_shapes = full_shapes or [im.shape for im in images]
 
-    # Additional Post-processing
-    # Aggregate all boxes with sufficient size
-    img_area = image.shape[0] * image.shape[1]
-    min_area = 0.0026 * img_area
-    valid = []
-    for x1, y1, x2, y2, *rest in boxes:
-        area = (x2 - x1) * (y2 - y1)
-        if area >= min_area:
-            valid.append([x1, y1, x2, y2])
+    def full_boxes(i, result):
+        return _to_full_resolution(_result_boxes(result), images[i], full_shapes[i])
 
-    if not valid:
-        print(f"Only tiny objects in {image_path}, skipping crop")
+    if not ADAPTIVE_RESOLUTION:
+        return [full_boxes(i, r) for i, r in enumerate(predict_images(model, images))]
+
+    coarse = predict_images(model, images, imgsz=COARSE_IMGSZ)
+    boxes = [full_boxes(i, r) for i, r in enumerate(coarse)]
+    uncertain = _needs_full_resolution(boxes, full_shapes)
+    retry = np.flatnonzero(uncertain).tolist()
+    if retry:
+        fine_inputs = []
+        for i in retry:
+            image = images[i]
+            if sources is not None and _is_reduced(image, full_shapes[i]):
+                image = decode_image(sources[i])
+                if image is None:
+                    image = images[i]
+            fine_inputs.append(image)
+        fine = predict_images(model, fine_inputs)
+        for i, image, r in zip(retry, fine_inputs, fine):
+            boxes[i] = _to_full_resolution(_result_boxes(r), image, full_shapes[i])
+            images[i] = image
+    return boxes
+
+# Signature of every setting that changes detect_boxes() output; part of the cache key
+def detection_params():
+    parts = [MODEL_FILENAME] + [
+        f"{k}={PREDICT_KWARGS[k]}" for k in ("imgsz", "conf", "iou", "max_det", "agnostic_nms")
+    ]
+    if ADAPTIVE_RESOLUTION:
+        parts.append(
+            f"coarse={COARSE_IMGSZ},{MIN_CONFIDENT_BOXES},{BORDER_TOLERANCE},"
+            f"{FULL_FRAME_FRACTION},{MIN_AREA_FRACTION}"
+        )
+    if REDUCED_DECODE:
+        parts.append("reduced-decode")
+    return ";".join(parts)
+
+# Detection cache for an output folder, or None when disabled/unavailable
+def cache_for_folder(folder):
+    if not USE_DETECTION_CACHE or not folder:
+        return None
+    try:
+        return get_cache(folder)
+    except (sqlite3.Error, OSError) as e:
+        print(f"Detection cache unavailable in {folder}: {e}")
+        return None
+
+# Cache key for a source image (None without a cache)
+def detection_key(cache, image_path):
+    if cache is None:
+        return None
+    return cache.key_for(image_path, detection_params())
+
+# detect_boxes() with the cache in front of it: only images whose key
+# misses are sent to the model (loaded lazily, so all-hit batches never
+# touch it) and their results are stored for next time. Like detect_boxes,
+# images may be updated in place with full-size decodes.
+def detect_boxes_cached(images, keys, cache, model=None, full_shapes=None, sources=None):
+    if cache is None:
+        return detect_boxes(model or get_model(), images, full_shapes, sources)
+
+    boxes = [cache.get(k) for k in keys]
+    missing = [i for i, b in enumerate(boxes) if b is None]
+    if missing:
+        missing_images = [images[i] for i in missing]
+        found = detect_boxes(
+            model or get_model(),
+            missing_images,
+            [full_shapes[i] for i in missing] if full_shapes else None,
+            [sources[i] for i in missing] if sources else None,
+        )
+        for i, image, b in zip(missing, missing_images, found):
+            images[i] = image
+            boxes[i] = b
+            cache.put(keys[i], b)
+    return boxes
+
+# Post-process detected boxes for a batch: combine each image's boxes into
+# one rectangle. Returns one (x_min, y_min, x_max, y_max) per image, or None
+# to keep that whole image. Pass shapes (full-resolution shapes) when the
+# images are reduced decodes and the boxes are in full-size coordinates.
+def compute_crop_boxes(images, boxes_list, image_paths, shapes=None):
+    shapes = shapes or [image.shape for image in images]
+    # Aggregate all boxes with sufficient size (vectorized over the batch)
+    unions, n_valid = union_boxes_ragged(*stack_boxes(boxes_list), shapes)
+
+    crops = []
+    for shape, boxes, union, n, image_path in zip(shapes, boxes_list, unions, n_valid, image_paths):
+        # Check for empty result
+        if boxes is None or len(boxes) == 0:
+            print(f"No objects detected in {image_path}")
+            crops.append(None)
+            continue
+        if n == 0:
+            print(f"Only tiny objects in {image_path}, skipping crop")
+            crops.append(None)
+            continue
+
+        # The union is the largest rectangle covering every valid box
+        x_min, y_min, x_max, y_max = (int(v) for v in union)
+
+        margin = 20
+        x_min = max(0, x_min - margin)
+        y_min = max(0, y_min - margin)
+        x_max = min(shape[1], x_max + margin)
+        y_max = min(shape[0], y_max + margin)
+        crops.append((x_min, y_min, x_max, y_max))
+    return crops
+
+# Single-image form of compute_crop_boxes
+def compute_crop_box(image, boxes, image_path):
+    return compute_crop_boxes([image], [boxes], [image_path])[0]
+
+# Write the cropped region (or the whole image when box is None)
+def write_crop(image, box, output_path):
+    if box is None:
         cv2.imwrite(output_path, image)
         return
+    x_min, y_min, x_max, y_max = box
+    cv2.imwrite(output_path, image[y_min:y_max, x_min:x_max])
+    print(f"Cropped and saved: {output_path}")
+
+# Write the crop of image_path given its detection input. JPEGs are cut
+# losslessly from the source file when possible, with no decode at all;
+# otherwise a reduced decode is replaced by the full-resolution image here,
+# so full-size pixels are only held for the duration of the write
+def save_crop(image, full_shape, box, image_path, output_path):
+    if LOSSLESS_JPEG and crop_jpeg(image_path, output_path, box):
+        if box is not None:
+            print(f"Cropped and saved (lossless): {output_path}")
+        return
+    if _is_reduced(image, full_shape):
+        image = decode_image(image_path)
+        if image is None:
+            return
+    write_crop(image, box, output_path)
+
+# Auto cropping function which loads image from the folder, predicts
+# the location of objects and combines all boxes into one rectangle
+def auto_crop_detected_objects(image_path, output_path):
+    image, full_shape = decode_for_detection(image_path)
+    if image is None:
+        return
+
+    # Predict the boxes for the image (or reuse cached ones). Hand the already
+    # decoded array to the model so the JPEG is not decoded a second time
+    cache = cache_for_folder(os.path.dirname(os.path.abspath(output_path)))
+    key = detection_key(cache, image_path)
+    images = [image]
+    boxes = detect_boxes_cached(images, [key], cache, full_shapes=[full_shape], sources=[image_path])[0]
+    box = compute_crop_boxes(images, [boxes], [image_path], shapes=[full_shape])[0]
+    save_crop(images[0], full_shape, box, image_path, output_path)
+
+# Batched variant of auto_crop_detected_objects. Takes (image_path, output_path)
+# pairs, decodes batch_size images at a time and runs each group through a
+# single predict call so the per-call overhead is paid once per batch.
+# on_done(image_path, output_path, ok) is called after each pair is written
+# (ok=False when the source could not be read); setting the optional stop
+# event ends the run before the next batch.
+def auto_crop_batch(pairs, batch_size=BATCH_SIZE, on_done=None, stop=None):
+    pairs = list(pairs)
+    batch_size = max(1, int(batch_size))
+
+    for start in range(0, len(pairs), batch_size):
+        if stop is not None and stop.is_set():
+            return
+        loaded = []
+        for image_path, output_path in pairs[start:start + batch_size]:
+            image, full_shape = decode_for_detection(image_path)
+            if image is None:
+                if on_done is not None:
+                    on_done(image_path, output_path, False)
+                continue
+            loaded.append((image_path, output_path, image, full_shape))
+        if not loaded:
+            continue
 
-    # Find the largest rectangle from all of the boxes in valid
-    v = np.array(valid)
-    x_min = int(np.min(v[:, 0])); y_min = int(np.min(v[:, 1]))
-    x_max = int(np.max(v[:, 2])); y_max = int(np.max(v[:, 3]))
-
-    margin = 20
-    x_min = max(0, x_min - margin)
-    y_min = max(0, y_min - margin)
-    x_max = min(image.shape[1], x_max + margin)
-    y_max = min(image.shape[0], y_max + margin)
-
-    # Write the cropped image to the output
-    cropped = image[y_min:y_max, x_min:x_max]
-    cv2.imwrite(output_path, cropped)
-    print(f"Cropped and saved: {output_path}")
\ No newline at end of file
+        # Outputs normally share one folder, so use the first output's cache
+        cache = cache_for_folder(os.path.dirname(os.path.abspath(loaded[0][1])))
+        images = [image for _src, _dst, image, _shape in loaded]
+        shapes = [shape for _src, _dst, _image, shape in loaded]
+        sources = [src for src, _dst, _image, _shape in loaded]
+        keys = [detection_key(cache, src) for src in sources]
+        detections = detect_boxes_cached(images, keys, cache, full_shapes=shapes, sources=sources)
+        crops = compute_crop_boxes(images, detections, sources, shapes=shapes)
+        # images holds the full-size decode of escalated images
+        for (src, output_path, _image, full_shape), image, box in zip(loaded, images, crops):
+            save_crop(image, full_shape, box, src, output_path)
+            if on_done is not None:
+                on_done(src, output_path, True)
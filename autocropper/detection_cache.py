@@ -0,0 +1,141 @@
+"""
+On-disk cache of raw detections, stored next to the crops in the output folder.
+
+Keyed by a content hash of the source image plus everything that influences
+detection (model file, predict settings, coarse-to-fine settings), the value
+is the final (N, 4) xyxy box array in source-image pixels. With a hit only the
+cheap box filter / union / margin step re-runs, so recrops and resumed runs
+skip inference for images that haven't changed.
+
+The cache is a single SQLite file, bounded by MAX_CACHE_BYTES of box data:
+least recently used entries are evicted first. Hit/miss counts are kept per
+cache object for logging. The file uses WAL on local disks and the rollback
+journal on network shares (fsinfo.sqlite_journal_mode).
+"""
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+
+import numpy as np
+
+from autocropper.fsinfo import sqlite_journal_mode
+
+CACHE_FILENAME = ".autocrop_detections.sqlite3"
+MAX_CACHE_BYTES = 64 * 1024 * 1024
+_EVICT_TO = 0.9          # evict down to 90% of the bound
+_HASH_CHUNK = 1 << 20
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_cache(folder):
+    """Open (once per process) the detection cache living in ``folder``."""
+    folder = os.path.abspath(folder)
+    with _caches_lock:
+        cache = _caches.get(folder)
+        if cache is None:
+            cache = DetectionCache(os.path.join(folder, CACHE_FILENAME))
+            _caches[folder] = cache
+        return cache
+
+def file_digest(path):
+    """Content hash of a file (hex), read in chunks."""
+    h = hashlib.blake2b(digest_size=20)
+    with open(path, "rb") as fh:
+        for chunk in iter(lambda: fh.read(_HASH_CHUNK), b""):
+            h.update(chunk)
+    return h.hexdigest()
+
+class DetectionCache:
+    def __init__(self, db_path, max_bytes=MAX_CACHE_BYTES):
+        self.db_path = db_path
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        # Shared by the decode/inference threads; access is serialized by _lock.
+        # timeout covers other processes (process-pool mode) holding the lock.
+        self._db = sqlite3.connect(db_path, timeout=30, check_same_thread=False)
+        self._db.execute(f"PRAGMA journal_mode={sqlite_journal_mode(os.path.dirname(db_path))}")
+        self._db.execute("PRAGMA synchronous=NORMAL")
+        self._db.execute(
+            "CREATE TABLE IF NOT EXISTS detections ("
+            " key TEXT PRIMARY KEY,"
+            " boxes BLOB NOT NULL,"
+            " last_used REAL NOT NULL)"
+        )
+        self._db.commit()
+        self._bytes = self._db.execute(
+            "SELECT COALESCE(SUM(LENGTH(boxes)), 0) FROM detections"
+        ).fetchone()[0]
+
+    def key_for(self, image_path, params):
+        """Cache key for an image file and a detection-parameters signature."""
+        try:
+            digest = file_digest(image_path)
+        except OSError:
+            return None
+        return f"{digest}:{params}"
+
+    def get(self, key):
+        """Cached (N, 4) float32 box array for key, or None on a miss."""
+        if key is None:
+            return None
+        with self._lock:
+            row = self._db.execute(
+                "SELECT boxes FROM detections WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self._db.execute(
+                "UPDATE detections SET last_used = ? WHERE key = ?", (time.time(), key)
+            )
+            self._db.commit()
+        return np.frombuffer(row[0], dtype=np.float32).reshape(-1, 4)
+
+    def put(self, key, boxes):
+        """Store the box array for key, evicting old entries past the bound."""
+        if key is None or boxes is None:
+            return
+        blob = np.ascontiguousarray(boxes[:, :4], dtype=np.float32).tobytes()
+        with self._lock:
+            old = self._db.execute(
+                "SELECT LENGTH(boxes) FROM detections WHERE key = ?", (key,)
+            ).fetchone()
+            self._db.execute(
+                "INSERT OR REPLACE INTO detections (key, boxes, last_used) VALUES (?, ?, ?)",
+                (key, blob, time.time()),
+            )
+            self._bytes += len(blob) - (old[0] if old else 0)
+            if self._bytes > self.max_bytes:
+                self._evict_locked()
+            self._db.commit()
+
+    def _evict_locked(self):
+        target = int(self.max_bytes * _EVICT_TO)
+        drop = []
+        for key, size in self._db.execute(
+            "SELECT key, LENGTH(boxes) FROM detections ORDER BY last_used"
+        ):
+            if self._bytes <= target:
+                break
+            drop.append((key,))
+            self._bytes -= size
+        self._db.executemany("DELETE FROM detections WHERE key = ?", drop)
+
+    def stats(self):
+        """Short human-readable hit/miss summary."""
+        total = self.hits + self.misses
+        rate = (100.0 * self.hits / total) if total else 0.0
+        return f"{self.hits} hits / {self.misses} misses ({rate:.0f}% hit rate)"
+
+    def close(self):
+        with self._lock:
+            try:
+                self._db.close()
+            except sqlite3.Error:
+                pass
@@ -0,0 +1,56 @@
+"""
+Where a folder lives: local disk or a network share.
+
+Output folders are often on a share (e.g. Z:\\auctionflex\\...). SQLite's WAL
+mode needs shared memory between every process that opens the database,
+which network filesystems don't provide, so the SQLite files kept in output
+folders (detection cache, reviewed store) use WAL only on local disks and
+the default rollback journal elsewhere; see sqlite_journal_mode().
+"""
+import os
+import sys
+
+# Filesystem types (/proc/mounts) that are network or otherwise remote mounts
+_NETWORK_FS = {
+    "nfs", "nfs4", "cifs", "smb", "smbfs", "smb3", "ncpfs", "afs", "9p",
+    "fuse.sshfs", "fuse.rclone", "davfs", "fuse.davfs2", "glusterfs", "ceph",
+}
+_DRIVE_REMOTE = 4   # GetDriveTypeW
+
+def _is_network_windows(path):
+    if path.startswith(("\\\\", "//")):
+        return True     # UNC path
+    drive = os.path.splitdrive(path)[0]
+    if not drive:
+        return False
+    try:
+        import ctypes
+        return ctypes.windll.kernel32.GetDriveTypeW(drive + "\\") == _DRIVE_REMOTE
+    except (OSError, AttributeError):
+        return False
+
+def _is_network_posix(path):
+    # Filesystem type of the longest mount point containing path
+    try:
+        with open("/proc/mounts", "r", encoding="utf-8") as fh:
+            mounts = [line.split()[1:3] for line in fh]
+    except OSError:
+        return False
+    best, fstype = "", ""
+    for mount_point, fs in mounts:
+        mount_point = mount_point.replace("\\040", " ")
+        prefix = mount_point.rstrip("/") + "/"
+        if (path == mount_point or path.startswith(prefix)) and len(mount_point) > len(best):
+            best, fstype = mount_point, fs
+    return fstype in _NETWORK_FS
+
+def is_network_path(path):
+    """True when path is on a network share (False when it can't be told)."""
+    path = os.path.realpath(path)
+    if sys.platform.startswith("win"):
+        return _is_network_windows(path)
+    return _is_network_posix(path)
+
+def sqlite_journal_mode(folder):
+    """Journal mode for a SQLite database in folder: WAL locally, else rollback."""
+    return "DELETE" if is_network_path(folder) else "WAL"
@@ -3,7 +3,25 @@ import tkinter as tk
 from tkinter import ttk, messagebox
 from PIL import Image, ImageTk
 
+# Redraws while the window is being resized use a fast filter; a high-quality
+# redraw follows once no resize has happened for this long
+HQ_REDRAW_MS = 150
+
+# Decode a screen-sized preview of an image (JPEG: scaled down by libjpeg
+# while decoding) plus the image's full-resolution size
+def load_preview(image_path, max_size):
+    with Image.open(image_path) as im:
+        full_size = im.size
+        im.draft("RGB", max_size)
+        im.thumbnail(max_size, Image.LANCZOS)
+        if im.mode not in ("RGB", "RGBA", "L"):
+            im = im.convert("RGB")
+        im.load()
+        return im, full_size
+
 # Crop Tool Window (drag rectangle to crop)
+# on_apply receives the selection as an (x1, y1, x2, y2) box in full-resolution
+# pixels; the tool itself never decodes the full-size image
 class CropTool(tk.Toplevel):
     # Initialize the window
     def __init__(self, master, image_path, on_apply):
@@ -15,9 +33,11 @@ class CropTool(tk.Toplevel):
         self.on_apply = on_apply
         self.image_path = image_path
 
-        # Load image
-        self.img_full = Image.open(image_path)
-        self.img_disp = self.img_full.copy()
+        # Load a screen-sized proxy; all drawing is done from it
+        self.img_proxy, self.full_size = load_preview(
+            image_path, (self.winfo_screenwidth(), self.winfo_screenheight())
+        )
+        self.img_disp = self.img_proxy
 
         # === Canvas with PALE ORANGE background ===
         self.canvas = tk.Canvas(self, bg="#FFE8CC", highlightthickness=0)  # pale orange
@@ -57,12 +77,23 @@ class CropTool(tk.Toplevel):
         self.focus_force()
 
         self._photo = None
-        self._draw_image()
+        self._image_id = None
+        self._drawn = None       # (width, height, high quality) last drawn
+        self._hq_job = None
+        self._draw_image(hq=True)
 
+    # Redraw fast now, and in high quality once resizing settles
     def _resize_fit(self, _evt=None):
-        self._draw_image()
+        self._draw_image(hq=False)
+        if self._hq_job is not None:
+            self.after_cancel(self._hq_job)
+        self._hq_job = self.after(HQ_REDRAW_MS, self._redraw_hq)
+
+    def _redraw_hq(self):
+        self._hq_job = None
+        self._draw_image(hq=True)
 
-    def _draw_image(self):
+    def _draw_image(self, hq=True):
         cw = max(self.canvas.winfo_width(), 1)
         ch = max(self.canvas.winfo_height(), 1)
 
@@ -70,13 +101,9 @@ class CropTool(tk.Toplevel):
         content_w = max(cw - (self.pad_left + self.pad_right), 1)
         content_h = max(ch - (self.pad_top + self.pad_bottom), 1)
 
-        iw, ih = self.img_full.size
+        iw, ih = self.full_size
         scale = min(content_w/iw, content_h/ih)
         dw, dh = max(int(iw*scale), 1), max(int(ih*scale), 1)
-        self.img_disp = self.img_full.resize((dw, dh), Image.LANCZOS)
-        self._photo = ImageTk.PhotoImage(self.img_disp)
-
-        self.canvas.delete("all")
 
         # center the image within the content area, honoring margins
         ox = self.pad_left + (content_w - dw)//2
@@ -84,8 +111,23 @@ class CropTool(tk.Toplevel):
         self._offset = (ox, oy)
         self._scale = scale
 
+        # <Configure> also fires for child widgets and moves, and the canvas
+        # can grow along the side that doesn't limit the image: an image
+        # already on screen at this size (and at least this quality) is only
+        # re-centred, not resampled
+        if self._drawn is not None and self._drawn[:2] == (dw, dh) and (self._drawn[2] or not hq):
+            self.canvas.coords(self._image_id, ox, oy)
+            return
+        self._drawn = (dw, dh, hq)
+
+        resample = Image.LANCZOS if hq else Image.NEAREST
+        self.img_disp = self.img_proxy.resize((dw, dh), resample)
+        self._photo = ImageTk.PhotoImage(self.img_disp)
+
+        self.canvas.delete("all")
+
         # draw image
-        self.canvas.create_image(ox, oy, anchor="nw", image=self._photo)
+        self._image_id = self.canvas.create_image(ox, oy, anchor="nw", image=self._photo)
 
         # if a selection exists, redraw overlays/rect
         if self._start and self._end:
@@ -155,7 +197,7 @@ class CropTool(tk.Toplevel):
         ix1 = int((x1 - ox) / scale);  iy1 = int((y1 - oy) / scale)
         ix2 = int((x2 - ox) / scale);  iy2 = int((y2 - oy) / scale)
 
-        iw, ih = self.img_full.size
+        iw, ih = self.full_size
         ix1 = max(0, min(ix1, iw - 1));  iy1 = max(0, min(iy1, ih - 1))
         ix2 = max(1, min(ix2, iw));      iy2 = max(1, min(iy2, ih))
 
@@ -163,6 +205,5 @@ class CropTool(tk.Toplevel):
             messagebox.showwarning("Crop", "Invalid crop area.")
             return
 
-        cropped = self.img_full.crop((ix1, iy1, ix2, iy2))
-        self.on_apply(cropped)
-        self.destroy()
\ No newline at end of file
+        self.on_apply((ix1, iy1, ix2, iy2))
+        self.destroy()
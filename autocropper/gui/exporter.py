@@ -3,7 +3,7 @@ import re
 import csv
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from autocropper.io_utils import parse_image_name, group_images_by_lot, compute_export_renames_for_lot, normalize_output_dir
+from autocropper.io_utils import group_images_by_lot, compute_export_renames_for_lot, normalize_output_dir, _apply_renames
 from autocropper.runtime import on_root_close
 
 # ---- CSV column map (0-based) ----
@@ -40,11 +40,17 @@ class ExportWindow(tk.Toplevel):
       - Write the final description to col 3 (DESC1_COL), clear cols 4..7
       - Update image names in columns 14+ to match on-disk renames
       - Allow appending a uniform snippet with a user-chosen separator
+
+    ``lots`` is an optional FolderWatcher of out_dir; with it, lot files are
+    read from memory instead of listing the folder for every lot.
     """
-    def __init__(self, master, lot_list, out_dir):
+    def __init__(self, master, lot_list, out_dir, lots=None):
         super().__init__(master)
         self.master = master
         self.out_dir = out_dir
+        self.lots = lots
+        self._listing = None
+        self._lot_keys_map = None
         self.title("Export: Add Descriptions")
         self.minsize(720, 420)
 
@@ -184,56 +190,46 @@ class ExportWindow(tk.Toplevel):
             if new:
                 row[col] = new
 
-    def _apply_renames_for_lot(self, lot_id: str) -> dict[str, str]:
+    def _lot_paths(self, lot_id: str) -> list[str]:
+        """Files of one lot (lot ids compared case-insensitively) in self.out_dir."""
+        source = self.lots if self.lots is not None else self._listed_lots()
+        return [p for lot in self._lot_keys().get(lot_id.lower(), []) for p in source.get(lot, [])]
+
+    def _lot_keys(self) -> dict[str, list[str]]:
+        # {lowercased lot id: [lot ids]}, built once per save so each lookup is O(1)
+        if self._lot_keys_map is None:
+            keys = {}
+            for lot in (self.lots if self.lots is not None else self._listed_lots()):
+                keys.setdefault(lot.lower(), []).append(lot)
+            self._lot_keys_map = keys
+        return self._lot_keys_map
+
+    def _listed_lots(self) -> dict[str, list[str]]:
+        # Without a watcher: one listing of the output folder per save
+        if self._listing is None:
+            self._listing = group_images_by_lot(self.out_dir)
+        return self._listing
+
+    def _apply_renames_for_lots(self, lot_ids) -> dict[str, dict[str, str]]:
         """
-        Compute & apply renames on disk for a single lot in self.out_dir.
-        Returns {old_basename: new_basename} for updating the CSV row filenames.
+        Compute & apply renames on disk for the given lots in self.out_dir, as
+        one journaled batch. Returns {lowercased lot_id: {old_basename:
+        new_basename}} for updating the CSV row filenames.
         """
-        folder = self.out_dir
-        # Collect files for this lot
-        abs_paths = []
-        try:
-            for name in os.listdir(folder):
-                parsed = parse_image_name(name)
-                if not parsed:
-                    continue
-                lot, _idx, _scheme, _ext = parsed
-                if lot.lower() == lot_id.lower():
-                    abs_paths.append(os.path.join(folder, name))
-        except FileNotFoundError:
-            pass
-
-        plan = compute_export_renames_for_lot(abs_paths)
-        if not plan:
-            return {}
-
-        # Apply plan safely by reusing normalize_output_dir logic
-        # (It already does safe renames, but we want only this lot; so mimic locally)
-        # We'll do it inline: two-phase move to avoid cycles.
-        temps = {}
-        used = set(os.listdir(folder))
-
-        def _temp_for(dst_path: str) -> str:
-            base = os.path.basename(dst_path)
-            stem, ext = os.path.splitext(base)
-            k = 0
-            while True:
-                tmp = f"{stem}.__tmp__{k}{ext}"
-                if tmp not in used:
-                    used.add(tmp)
-                    return os.path.join(folder, tmp)
-                k += 1
-
-        for src, dst in plan.items():
-            if os.path.exists(src):
-                tmp = _temp_for(dst)
-                os.replace(src, tmp)
-                temps[tmp] = dst
-
-        for tmp, dst in temps.items():
-            os.replace(tmp, dst)
-
-        return {os.path.basename(s): os.path.basename(d) for s, d in plan.items()}
+        self._listing = None
+        self._lot_keys_map = None
+        plans = {lot_id: compute_export_renames_for_lot(self._lot_paths(lot_id))
+                 for lot_id in {lot_id.lower() for lot_id in lot_ids}}
+        batch = {src: dst for plan in plans.values() for src, dst in plan.items()}
+        names = self.lots.names() if self.lots is not None else None
+        applied = _apply_renames(batch, names=names)
+        if self.lots is not None and applied:
+            self.lots.refresh(*applied.keys(), *applied.values())
+
+        return {
+            lot_id: {os.path.basename(s): os.path.basename(d) for s, d in plan.items() if s in applied}
+            for lot_id, plan in plans.items()
+        }
 
     def _apply_and_save(self):
         if not self.rows:
@@ -245,7 +241,15 @@ class ExportWindow(tk.Toplevel):
         allowed_lots = self.lot_list if self.only_session_lots.get() else None
 
         total_desc_updates = 0
-        lot_basename_cache: dict[str, dict[str,str]] = {}
+
+        # Ensure on-disk names of every lot in the CSV match our export policy
+        # (one batch for all lots); rows are then rewritten to the new names
+        lot_ids = set()
+        for r in self.rows:
+            lot_id = (r[LOT_COL].strip() if len(r) > LOT_COL else "")
+            if lot_id and (allowed_lots is None or lot_id in allowed_lots):
+                lot_ids.add(lot_id)
+        lot_basename_cache = self._apply_renames_for_lots(lot_ids)
 
         updated_rows = []
         for r in self.rows:
@@ -281,11 +285,8 @@ class ExportWindow(tk.Toplevel):
                     r += [""] * (c - len(r) + 1)
                 r[c] = ""
 
-            # 4) Ensure on-disk names for this lot match our export policy,
-            #    then rewrite row image filenames (cols 14+) to the new basenames.
-            if lot_id not in lot_basename_cache:
-                lot_basename_cache[lot_id] = self._apply_renames_for_lot(lot_id)
-            self._rewrite_row_images(r, lot_basename_cache[lot_id])
+            # 4) Rewrite row image filenames (cols 14+) to the renamed basenames
+            self._rewrite_row_images(r, lot_basename_cache.get(lot_id.lower(), {}))
 
             updated_rows.append(r)
 
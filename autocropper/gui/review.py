@@ -1,11 +1,14 @@
-import os, shutil, tkinter as tk
-import gc
+import os, queue, shutil, threading, tkinter as tk
+from concurrent.futures import ThreadPoolExecutor
 from tkinter import ttk, messagebox, filedialog
-from PIL import Image, ImageTk
+from PIL import Image
 from autocropper.io_utils import sort_paths_by_index, display_order_for_path, parse_image_name, _target_name, _apply_renames
-from autocropper.cropper import auto_crop_detected_objects
+from autocropper.cropper import auto_crop_batch
+from autocropper.lossless import crop_jpeg, rotate_jpeg
 from autocropper.gui.crop_tool import CropTool
+from autocropper.gui.thumbs import get_thumb_cache
 from autocropper.gui.auctionFlex_instructions import AuctionFlexInstructionsWindow
+from autocropper.reviewed import get_reviewed_store
 from autocropper.runtime import on_root_close
 
 
@@ -58,6 +61,82 @@ class Tooltip:
         # keep tooltip scheduled while moving over widget
         return
 
+# One thumbnail slot of a review grid: image label plus its control row.
+# Cells are positional (cell i always shows the i-th path) and are reused
+# across lots, reorders and resizes; only their contents change.
+class GridCell:
+    def __init__(self, win, frame, i, selectable):
+        self.key = None   # (path, file identity, thumb w, thumb h) on display
+        self.img_label = tk.Label(frame, relief="groove", bd=2)
+        if selectable:
+            self.img_label.bind("<Button-1>", lambda e, k=i: win._select_after(k))
+            self.img_label.bind("<Double-Button-1>", lambda e, k=i: win._open_crop_tool(k))
+
+        self.controls = tk.Frame(frame)
+
+        # left rotate
+        btn_l = ttk.Button(self.controls, text="⟲", width=1.5,
+                        command=lambda k=i: win._rotate_index(k, -90))
+        btn_l.pack(side="left", padx=(0,10))
+        Tooltip(btn_l, "Rotate left (hotkey: 4 or Left arrow)")
+
+        # index image up
+        btn_up = ttk.Button(self.controls, text="↑", width=1.5,
+                            command=lambda k=i: win._image_index(k, 1))
+        btn_up.pack(side="left", padx=4)
+        Tooltip(btn_up, "Move image up (hotkey: Up arrow or 8)")
+
+        # caption in the middle
+        self.cap = tk.Label(self.controls)
+        self.cap.pack(side= "left", padx = (5,5))
+        self.cap_tip = Tooltip(self.cap, "")
+
+        # index image down
+        btn_down = ttk.Button(self.controls, text="↓", width=1.5,
+                              command=lambda k=i: win._image_index(k, -1))
+        btn_down.pack(side="left", padx=4)
+        Tooltip(btn_down, "Move image down (hotkey: Down arrow or 2)")
+
+        # right rotate
+        btn_r = ttk.Button(self.controls, text="⟳", width=1.5,
+                        command=lambda k=i: win._rotate_index(k, 90))
+        btn_r.pack(side="left", padx=(10,0))
+        Tooltip(btn_r, "Rotate right (hotkey: 6 or Right arrow)")
+
+    def show(self, i, cols):
+        row = (i // cols) * 2 + 1
+        col = (i % cols)
+        self.img_label.grid(row=row, column=col, padx=6, pady=6)
+        self.controls.grid(row=row+1, column=col, pady=(0, 10))
+
+    def hide(self):
+        self.img_label.grid_remove()
+        self.controls.grid_remove()
+        self.set_image(None, "")
+        self.key = None
+
+    def set_image(self, ph, fallback_text):
+        # With an image, width/height are pixels (0 = natural size); for the
+        # text placeholder they are characters
+        if ph is not None:
+            self.img_label.configure(image=ph, text="", width=0, height=0)
+        else:
+            self.img_label.configure(image="", text=fallback_text, width=32, height=12)
+        self.img_label.image = ph
+
+# Lots around the current one whose thumbnails are decoded in the background
+# (offsets into lot_list, nearest first) and the threads doing it
+PREFETCH_OFFSETS = (1, -1, 2)
+PREFETCH_WORKERS = 2
+
+# How often the window checks folder watchers (see autocropper.watcher) for
+# files changed outside the app, e.g. photos dropped into the output folder
+WATCH_CHECK_MS = 1000
+
+# Delay before the grids follow a window resize (thumbnails are rescaled in
+# memory from their pyramid, so this only coalesces configure events)
+RESIZE_DEBOUNCE_MS = 60
+
 class ReviewController:
     def __init__(self, root, lot_list, grouped_input, grouped_output, on_export_open, out_dir=None):
         self.root = root
@@ -67,6 +146,9 @@ class ReviewController:
         self.idx = 0
         self.on_export_open = on_export_open
         self.out_dir = out_dir
+        self._prefetch_pool = ThreadPoolExecutor(PREFETCH_WORKERS, thread_name_prefix="review-prefetch")
+        self._prefetch_jobs = []
+        self._prefetch_gen = 0
 
         lot = self.lot_list[self.idx]
         self.win = LotReviewWindow(
@@ -82,11 +164,53 @@ class ReviewController:
             grouped_output=self.go,
             out_dir=self.out_dir,
         )
+        self.win.bind("<Destroy>", self._on_win_destroy, add="+")
+        self.prefetch_around(self.idx)
 
     def open_idx(self, i):
+        self.cancel_prefetch()
         self.idx = max(0, min(i, len(self.lot_list)-1))
         lot = self.lot_list[self.idx]
         self.win.set_lot(lot, self.gi.get(lot, []), self.go.get(lot, []))
+        self.prefetch_around(self.idx)
+
+    def prefetch_around(self, idx):
+        """
+        Decode the thumbnails of the lots next to idx into the window's
+        thumbnail cache on background threads, so switching lots only has to
+        hand finished bitmaps to Tk.
+        """
+        gen = self._prefetch_gen
+        size = (self.win.THUMB_W, self.win.THUMB_H)
+        thumbs = self.win.thumbs
+        for off in PREFETCH_OFFSETS:
+            j = idx + off
+            if not (0 <= j < len(self.lot_list)):
+                continue
+            lot = self.lot_list[j]
+            paths = list(self.gi.get(lot, [])) + list(self.go.get(lot, []))
+            self._prefetch_jobs.append(
+                self._prefetch_pool.submit(self._prefetch_paths, gen, thumbs, paths, size)
+            )
+
+    def _prefetch_paths(self, gen, thumbs, paths, size):
+        for p in paths:
+            # Stop as soon as the reviewer has moved somewhere else
+            if gen != self._prefetch_gen:
+                return
+            thumbs.get(p, size)
+
+    def cancel_prefetch(self):
+        """Drop queued prefetches; running ones stop after their current image."""
+        self._prefetch_gen += 1
+        for fut in self._prefetch_jobs:
+            fut.cancel()
+        self._prefetch_jobs = []
+
+    def _on_win_destroy(self, event):
+        if event.widget is self.win:
+            self.cancel_prefetch()
+            self._prefetch_pool.shutdown(wait=False, cancel_futures=True)
 
     def prev(self): self.open_idx(self.idx - 1)
     def next(self): self.open_idx(self.idx + 1)
@@ -105,6 +229,8 @@ class LotReviewWindow(tk.Toplevel):
         self.gi = grouped_input or {}
         self.go = grouped_output or {}
         self.out_dir = out_dir
+        # Thumbnails (memory LRU + disk cache in the output folder)
+        self.thumbs = get_thumb_cache(out_dir)
         self.on_prev_lot = on_prev_lot
         self.on_next_lot = on_next_lot
         self.on_export_open = on_export_open
@@ -114,7 +240,17 @@ class LotReviewWindow(tk.Toplevel):
         self.COLS = 3
         self._resize_job = None
         self._selected_idx = None
-        self._after_labels = []
+        self._after_labels = []      # (img_label, caption) per visible AFTER cell
+        self._cells = {}             # grid frame -> list of GridCell (recycled)
+
+        # Background recrop state (one job at a time, results polled on Tk thread)
+        self._recrop_pool = ThreadPoolExecutor(1, thread_name_prefix="review-recrop")
+        self._recrop_stop = None     # set while a recrop job runs
+        self._recrop_lot = None      # lot the running recrop belongs to
+        self._recrop_events = queue.Queue()
+        self._recrop_total = 0
+        self._recrop_done = 0
+        self._recrop_ok = 0
 
         # Top Toolbar
         self.topbar = ttk.Frame(self)
@@ -203,6 +339,16 @@ class LotReviewWindow(tk.Toplevel):
         delete_sel_btn.pack(pady=6)
         Tooltip(delete_sel_btn, "Delete the selected AFTER image and mark it reviewed (no hotkey assigned)")
 
+        # Inline recrop progress (shown only while a recrop runs)
+        self._recrop_box = ttk.Frame(self.center_bar)
+        self._recrop_label = ttk.Label(self._recrop_box, text="")
+        self._recrop_label.pack(pady=(0, 4))
+        self._recrop_bar = ttk.Progressbar(self._recrop_box, length=160, mode="determinate")
+        self._recrop_bar.pack(pady=(0, 4))
+        cancel_recrop_btn = ttk.Button(self._recrop_box, text="✖ Cancel Recrop", width=18, command=self._cancel_recrop)
+        cancel_recrop_btn.pack()
+        Tooltip(cancel_recrop_btn, "Stop recropping after the images already in progress")
+
         self._build_group(self.left_frame,  self.before_paths, selectable=False, is_after=False)
         self._build_group(self.right_frame, self.after_paths,  selectable=True,  is_after=True)
 
@@ -268,6 +414,43 @@ class LotReviewWindow(tk.Toplevel):
         self._bind_hotkeys()
         self.focus_force()
 
+        # gi/go may be FolderWatcher mappings that follow the folders live
+        self._watch_versions = self._folder_versions()
+        if self._watch_versions != (None, None):
+            self.after(WATCH_CHECK_MS, self._check_folders)
+
+    def _folder_versions(self):
+        return getattr(self.gi, "version", None), getattr(self.go, "version", None)
+
+    def _check_folders(self):
+        # Show the current lot's files as they are on disk now when a watcher
+        # saw a change; the app's own changes already updated the lists
+        try:
+            versions = self._folder_versions()
+            if versions != self._watch_versions and self._recrop_stop is None:
+                self._watch_versions = versions
+                before = sort_paths_by_index(self.gi.get(self.lot_number, []))
+                after = sort_paths_by_index(self.go.get(self.lot_number, []))
+                if before != self.before_paths:
+                    self.before_paths = before
+                    self._build_group(self.left_frame, self.before_paths, selectable=False, is_after=False)
+                if after != self.after_paths:
+                    self.after_paths = after
+                    self._selected_idx = None
+                    self._rebuild_after()
+                self._on_content_configure()
+            self.after(WATCH_CHECK_MS, self._check_folders)
+        except tk.TclError:
+            pass
+
+    def _files_changed(self, *paths):
+        # Output files rewritten, renamed or deleted by the review window:
+        # drop their cached thumbnails and update the output folder watcher
+        self.thumbs.invalidate(*paths)
+        refresh = getattr(self.go, "refresh", None)
+        if refresh is not None:
+            refresh(*paths)
+
     def _bind_hotkeys(self):
         for seq, handler in getattr(self, "_hotkey_bindings", []):
             try:
@@ -290,6 +473,8 @@ class LotReviewWindow(tk.Toplevel):
         
         if save_resp is None or save_resp is False:
             self._disable_global_scroll()
+            self._shutdown_recrop()
+            self._flush_reviewed()
             self._clear_image_refs(self.left_frame)
             self._clear_image_refs(self.right_frame)
             try:
@@ -308,6 +493,8 @@ class LotReviewWindow(tk.Toplevel):
             return
         if save_resp:
             self._mark_current_lot_reviewed()
+        self._shutdown_recrop()
+        self._flush_reviewed()
         try:
             self.destroy()
         finally:
@@ -331,6 +518,8 @@ class LotReviewWindow(tk.Toplevel):
         target = (self._jump_var.get() or "").strip()
         if not target:
             return
+        if self._recrop_running("Jump"):
+            return
         # Exact match on lot id as keyed in visible lot_list (supports '6', '6a', etc.)
         idx = None
         try:
@@ -346,7 +535,11 @@ class LotReviewWindow(tk.Toplevel):
                 lowered_all = [s.lower() for s in all_keys]
                 if target.lower() in lowered_all:
                     lot = all_keys[lowered_all.index(target.lower())]
-                    # show that lot locally
+                    # show that lot locally (prefetch for the old position is stale)
+                    try:
+                        self.on_prev_lot.__self__.cancel_prefetch()  # type: ignore[attr-defined]
+                    except Exception:
+                        pass
                     self.master.after(0, lambda: self.master.focus_force())
                     self._jump_var.set("")
                     self.set_lot(lot, self.gi.get(lot, []), self.go.get(lot, []))
@@ -379,6 +572,8 @@ class LotReviewWindow(tk.Toplevel):
             self._mark_current_lot_reviewed()
 
         self._disable_global_scroll()
+        self._shutdown_recrop()
+        self._flush_reviewed()
         self._clear_image_refs(self.left_frame)
         self._clear_image_refs(self.right_frame)
         try:
@@ -435,18 +630,7 @@ class LotReviewWindow(tk.Toplevel):
         self.title(f"Lot {self.lot_number} — Review")
         self.header_label.configure(text=f"Lot {self.lot_number}")
 
-        self._clear_image_refs(self.left_frame)
-        self._clear_image_refs(self.right_frame)
-        for w in self.left_frame.grid_slaves():
-            if int(w.grid_info().get("row", 1)) >= 0:
-                w.destroy()
-        for w in self.right_frame.grid_slaves():
-            if int(w.grid_info().get("row", 1)) >= 0:
-                w.destroy()
-
-        ttk.Label(self.left_frame, text="BEFORE", font=("Segoe UI", 11, "bold")).grid(row=0, column=0, columnspan=self.COLS, pady=(0, 8))
-        ttk.Label(self.right_frame, text="AFTER (click to select, double-click to crop)", font=("Segoe UI", 11, "bold")).grid(row=0, column=0, columnspan=self.COLS, pady=(0, 8))
-
+        # Grid cells are reused; only their images/captions change
         self._build_group(self.left_frame,  self.before_paths, selectable=False, is_after=False)
         self._build_group(self.right_frame, self.after_paths,  selectable=True,  is_after=True)
         self.after(0, self._autosize_to_content)
@@ -490,28 +674,11 @@ class LotReviewWindow(tk.Toplevel):
 
     def _rebuild_all(self):
         """
-        Rebuild BEFORE and AFTER grids using current THUMB_W/THUMB_H and 3 columns.
+        Refresh BEFORE and AFTER grids for the current THUMB_W/THUMB_H
+        (cells are kept; every image is rescaled in memory from its
+        thumbnail pyramid, nothing is read from disk).
         """
-        self._clear_image_refs(self.left_frame)
-        self._clear_image_refs(self.right_frame)
-
-        for w in self.left_frame.grid_slaves():
-            w.destroy()
-        for w in self.right_frame.grid_slaves():
-            w.destroy()
-
-        ttk.Label(
-            self.left_frame,
-            text="BEFORE",
-            font=("Segoe UI", 11, "bold")
-        ).grid(row=0, column=0, columnspan=self.COLS, pady=(0, 8))
-
-        ttk.Label(
-            self.right_frame,
-            text="AFTER (click to select, double-click to crop)",
-            font=("Segoe UI", 11, "bold")
-        ).grid(row=0, column=0, columnspan=self.COLS, pady=(0, 8))
-
+        self._resize_job = None
         self._build_group(self.left_frame,  self.before_paths, selectable=False, is_after=False)
         self._build_group(self.right_frame, self.after_paths, selectable=True, is_after=True)
 
@@ -558,7 +725,7 @@ class LotReviewWindow(tk.Toplevel):
         # Debounce rebuild
         if self._resize_job is not None:
             self.after_cancel(self._resize_job)
-        self._resize_job = self.after(120, self._rebuild_all)
+        self._resize_job = self.after(RESIZE_DEBOUNCE_MS, self._rebuild_all)
 
     def _enable_global_scroll(self):
         self.bind_all("<MouseWheel>", self._on_global_wheel, add="+")
@@ -591,75 +758,59 @@ class LotReviewWindow(tk.Toplevel):
             pass
 
     def _build_group(self, frame, paths, selectable, is_after):
-        # clear existing rows (but first drop image refs so Tk can free bitmaps)
-        self._clear_image_refs(frame)
-        for w in frame.grid_slaves():
-            if int(w.grid_info().get("row", 1)) >= 1:
-                w.destroy()
-        if is_after:
-            self._after_labels.clear()
+        """
+        Show ``paths`` in ``frame``'s grid, reusing its cells. Cells whose
+        file, size on disk and thumbnail size are unchanged are left alone;
+        a thumbnail that merely moved to another cell (reorder, delete) is
+        handed over without decoding anything.
+        """
+        cells = self._cells.setdefault(frame, [])
+        # PhotoImages currently on screen, by (file identity, thumb size)
+        on_screen = {
+            c.key[1:]: c.img_label.image
+            for c in cells
+            if c.key is not None and c.key[1] is not None and getattr(c.img_label, "image", None) is not None
+        }
+
+        while len(cells) < len(paths):
+            cells.append(GridCell(self, frame, len(cells), selectable))
+        for cell in cells[len(paths):]:
+            cell.hide()
 
         for i, p in enumerate(paths):
-            row = (i // self.COLS) * 2 + 1
-            col = (i % self.COLS)
-
-            if os.path.exists(p):
-                try:
-                    with Image.open(p) as im:
-                        im.thumbnail((self.THUMB_W, self.THUMB_H))
-                        ph = ImageTk.PhotoImage(im, master=self)   # <- tie to toplevel
-                    img_label = tk.Label(frame, image=ph, relief="groove", bd=2)
-                    img_label.image = ph  # <- keep only on the widget
-                except Exception:
-                    img_label = tk.Label(frame, text="(unreadable)", width=32, height=12, relief="groove")
-            else:
-                img_label = tk.Label(frame, text="(missing)", width=32, height=12, relief="groove")
-
-            if selectable and is_after:
-                idx = i
-                img_label.bind("<Button-1>", lambda e, k=idx: self._select_after(k))
-                img_label.bind("<Double-Button-1>", lambda e, k=idx: self._open_crop_tool(k))
-
-            img_label.grid(row=row, column=col, padx=6, pady=6)
-
+            cell = cells[i]
+            cell.show(i, self.COLS)
+            self._show_in_cell(cell, p, on_screen)
             order_num = display_order_for_path(p) or (i + 1)
-            controls = tk.Frame(frame)
-            controls.grid(row=row+1, column=col, pady=(0, 10))
-
-            # left rotate
-            btn_l = ttk.Button(controls, text="⟲", width=1.5,
-                            command=lambda k=i: self._rotate_index(k, -90))
-            btn_l.pack(side="left", padx=(0,10))
-            Tooltip(btn_l, "Rotate left (hotkey: 4 or Left arrow)")
-
-            # index image up
-            btn_up = ttk.Button(controls, text="↑", width=1.5,
-                                command=lambda k=i: self._image_index(k, 1))
-            btn_up.pack(side="left", padx=4)
-            Tooltip(btn_up, "Move image up (hotkey: Up arrow or 8)")
-
-            # caption in the middle
-            cap = tk.Label(controls, text=f"#{order_num}")
-            cap.pack(side= "left", padx = (5,5))
-            Tooltip(cap, f"{p} — display order #{order_num}")
-
-            # index image down
-            btn_up = ttk.Button(controls, text="↓", width=1.5,
-                                command=lambda k=i: self._image_index(k, -1))
-            btn_up.pack(side="left", padx=4)
-            Tooltip(btn_up, "Move image down (hotkey: Down arrow or 2)")
-
-            # right rotate
-            btn_r = ttk.Button(controls, text="⟳", width=1.5,
-                            command=lambda k=i: self._rotate_index(k, 90))
-            btn_r.pack(side="left", padx=(10,0))
-            Tooltip(btn_r, "Rotate right (hotkey: 6 or Right arrow)")
-
+            cell.cap.configure(text=f"#{order_num}")
+            cell.cap_tip.text = f"{p} — display order #{order_num}"
             if is_after:
-                self._after_labels.append((img_label, cap))
+                cell.img_label.configure(highlightthickness=0)
+
+        if is_after:
+            self._after_labels = [(c.img_label, c.cap) for c in cells[:len(paths)]]
+
+    def _show_in_cell(self, cell, p, on_screen=None):
+        try:
+            st = os.stat(p)
+            ident = (st.st_mtime_ns, st.st_size, st.st_ino)
+        except OSError:
+            ident = None
+        key = (p, ident, self.THUMB_W, self.THUMB_H)
+        if cell.key == key:
+            return
+        if ident is None:
+            cell.set_image(None, "(missing)")
+        else:
+            ph = (on_screen or {}).get(key[1:])
+            if ph is None:
+                ph = self.thumbs.photo(p, (self.THUMB_W, self.THUMB_H), self)   # <- tie to toplevel
+            cell.set_image(ph, "(unreadable)")
+        cell.key = key
 
     def _selected_image_index(self, direction: int):
         if not self._require_selection(): return
+        if self._recrop_running("Reorder"): return
         self._image_index(self._selected_idx, direction)
         return
 
@@ -671,6 +822,8 @@ class LotReviewWindow(tk.Toplevel):
         """
         if not (0 <= idx < len(self.after_paths)):
             return
+        if self._recrop_running("Reorder"):
+            return
 
         if direction == 1:  # move up
             if idx == 0:
@@ -737,6 +890,7 @@ class LotReviewWindow(tk.Toplevel):
 
         # Apply via shared safe renamer (handles cycles with temp files)
         _apply_renames(plan)
+        self._files_changed(*plan.keys(), *plan.values())
 
         # Update our in-memory paths to final names, and keep them sorted by index
         self.after_paths = sort_paths_by_index(new_paths)
@@ -756,30 +910,44 @@ class LotReviewWindow(tk.Toplevel):
 
     def _rotate_selected(self, deg):
         if not self._require_selection(): return
+        if self._recrop_running("Rotate"): return
         idx = self._selected_idx
         path = self.after_paths[idx]
         if not os.path.exists(path):
             messagebox.showerror("Rotate", "Selected image is missing.")
             return
         try:
-            im = Image.open(path)
-            im = im.rotate(-deg, expand=True)
-            im.save(path)
+            # Lossless for JPEGs when jpegtran is available, else re-encode
+            if not rotate_jpeg(path, deg):
+                im = Image.open(path)
+                im = im.rotate(-deg, expand=True)
+                im.save(path)
+            self._files_changed(path)
             self._refresh_after(idx)
         except Exception as e:
             messagebox.showerror("Rotate", str(e))
 
     def _crop_selected(self):
         if not self._require_selection(): return
+        if self._recrop_running("Crop"): return
         idx = self._selected_idx
         path = self.after_paths[idx]
         if not os.path.exists(path):
             messagebox.showerror("Crop", "Selected image is missing.")
             return
 
-        def on_apply(pil_image):
+        def on_apply(box):
+            # The crop tool stays open on its own; a recrop may have started since
+            if self._recrop_running("Crop"):
+                return
             try:
-                pil_image.save(path)
+                # Lossless for JPEGs when jpegtran is available (only the
+                # selected MCUs are copied), else decode, crop and re-encode
+                if not crop_jpeg(path, path, box):
+                    with Image.open(path) as im:
+                        cropped = im.crop(box)
+                    cropped.save(path)
+                self._files_changed(path)
                 self._refresh_after(idx)
             except Exception as e:
                 messagebox.showerror("Crop", str(e))
@@ -788,107 +956,157 @@ class LotReviewWindow(tk.Toplevel):
 
     def _revert_selected(self):
         if not self._require_selection(): return
+        if self._recrop_running("Revert"): return
         idx = self._selected_idx
         after_p = self.after_paths[idx]
-        ord_after = display_order_for_path(after_p) or (idx + 1)
-        match_before = None
-        for p in self.before_paths:
-            if (display_order_for_path(p) or -1) == ord_after:
-                match_before = p
-                break
-        if match_before is None and idx < len(self.before_paths):
-            match_before = self.before_paths[idx]
+        match_before = self._matching_before(idx)
         if match_before and os.path.exists(match_before):
             shutil.copyfile(match_before, after_p)
+            self._files_changed(after_p)
             self._refresh_after(idx)
         else:
             messagebox.showerror("Revert", "Matching BEFORE image not found.")
 
     def _revert_all(self):
+        if self._recrop_running("Revert All"):
+            return
         count = 0
         for i in range(len(self.after_paths)):
             after_p = self.after_paths[i]
-            ord_after = display_order_for_path(after_p) or (i + 1)
-            match_before = None
-            for p in self.before_paths:
-                if (display_order_for_path(p) or -1) == ord_after:
-                    match_before = p
-                    break
-            if match_before is None and i < len(self.before_paths):
-                match_before = self.before_paths[i]
+            match_before = self._matching_before(i)
             if match_before and os.path.exists(match_before):
                 shutil.copyfile(match_before, after_p)
+                self._files_changed(after_p)
                 count += 1
         self._rebuild_after()
         messagebox.showinfo("Revert All", f"Reverted {count} images.")
 
+    def _matching_before(self, idx):
+        """BEFORE image for AFTER index idx (same display order, else same position)."""
+        ord_after = display_order_for_path(self.after_paths[idx]) or (idx + 1)
+        for p in self.before_paths:
+            if (display_order_for_path(p) or -1) == ord_after:
+                return p
+        if idx < len(self.before_paths):
+            return self.before_paths[idx]
+        return None
+
     def _recrop_selected(self):
         if not self._require_selection(): return
         idx = self._selected_idx
-        after_p  = self.after_paths[idx]
-        ord_after = display_order_for_path(after_p) or (idx + 1)
-        before_p = None
-        for p in self.before_paths:
-            if (display_order_for_path(p) or -1) == ord_after:
-                before_p = p; break
-        if before_p is None and idx < len(self.before_paths):
-            before_p = self.before_paths[idx]
+        before_p = self._matching_before(idx)
         if not (before_p and os.path.exists(before_p)):
             messagebox.showerror("Recrop Selected", "Matching BEFORE image not found.")
             return
-        try:
-            auto_crop_detected_objects(before_p, after_p)
-            self._refresh_after(idx)
-        except Exception as e:
-            messagebox.showerror("Recrop Selected", str(e))
+        self._start_recrop("Recrop Selected", [(before_p, self.after_paths[idx])])
 
     def _recrop_all(self):
-        count = 0
+        pairs = []
         for i, after_p in enumerate(self.after_paths):
-            ord_after = display_order_for_path(after_p) or (i + 1)
-            before_p = None
-            for p in self.before_paths:
-                if (display_order_for_path(p) or -1) == ord_after:
-                    before_p = p; break
-            if before_p is None and i < len(self.before_paths):
-                before_p = self.before_paths[i]
+            before_p = self._matching_before(i)
             if before_p and os.path.exists(before_p):
-                try:
-                    auto_crop_detected_objects(before_p, after_p)
-                    count += 1
-                except Exception as e:
-                    print("Recrop error:", e)
-        self._rebuild_after()
-        messagebox.showinfo("Recrop All", f"Recropped {count} images.")
+                pairs.append((before_p, after_p))
+        self._start_recrop("Recrop All", pairs)
 
-    def _refresh_after(self, idx):
-        (lbl, _cap) = self._after_labels[idx]
-        p = self.after_paths[idx]
-        if os.path.exists(p):
+    def _start_recrop(self, title, pairs):
+        """
+        Recrop (before, after) pairs on the background executor, batched
+        through the model. Each AFTER thumbnail refreshes as its crop lands.
+        """
+        if self._recrop_stop is not None:
+            messagebox.showinfo(title, "A recrop is already running.")
+            return
+        if not pairs:
+            messagebox.showinfo(title, "Recropped 0 images.")
+            return
+
+        stop = threading.Event()
+        self._recrop_stop = stop
+        self._recrop_lot = self.lot_number
+        self._recrop_total = len(pairs)
+        self._recrop_done = 0
+        self._recrop_ok = 0
+        self._recrop_bar.configure(maximum=len(pairs), value=0)
+        self._recrop_label.configure(text=f"Recropping 0 of {len(pairs)}…")
+        self._recrop_box.pack(pady=(12, 6))
+
+        events = self._recrop_events
+
+        def job():
             try:
-                with Image.open(p) as im:
-                    im.thumbnail((self.THUMB_W, self.THUMB_H))
-                    ph = ImageTk.PhotoImage(im, master=self)
-                lbl.configure(image=ph)
-                # drop old ref first (helps GC)
-                if hasattr(lbl, "image"):
-                    lbl.image = None
-                lbl.image = ph
-            except Exception:
-                lbl.configure(text="(unreadable)", image="", width=32, height=12)
-                if hasattr(lbl, "image"):
-                    lbl.image = None
-        else:
-            lbl.configure(text="(missing)", image="", width=32, height=12)
-            if hasattr(lbl, "image"):
-                lbl.image = None
+                auto_crop_batch(
+                    pairs,
+                    on_done=lambda _src, dst, ok: events.put(("done", dst, ok)),
+                    stop=stop,
+                )
+            except Exception as e:
+                print("Recrop error:", e)
+                events.put(("error", str(e), False))
+            finally:
+                events.put(("finished", title, stop.is_set()))
+
+        self._recrop_pool.submit(job)
+        self.after(100, self._poll_recrop)
+
+    def _poll_recrop(self):
+        # Runs on the Tk thread: apply results the recrop job queued
+        try:
+            while True:
+                kind, value, flag = self._recrop_events.get_nowait()
+                if kind == "done":
+                    self._recrop_done += 1
+                    self._recrop_ok += int(flag)
+                    self._files_changed(value)
+                    if self.lot_number == self._recrop_lot and value in self.after_paths:
+                        self._refresh_after(self.after_paths.index(value))
+                    self._recrop_bar.configure(value=self._recrop_done)
+                    self._recrop_label.configure(text=f"Recropping {self._recrop_done} of {self._recrop_total}…")
+                elif kind == "error":
+                    messagebox.showerror("Recrop", value)
+                elif kind == "finished":
+                    self._recrop_stop = None
+                    self._recrop_lot = None
+                    self._recrop_box.pack_forget()
+                    note = " (cancelled)" if flag else ""
+                    messagebox.showinfo(value, f"Recropped {self._recrop_ok} images{note}.")
+                    return
+        except queue.Empty:
+            pass
+        except tk.TclError:
+            return
+        self.after(100, self._poll_recrop)
+
+    def _recrop_running(self, title):
+        # The recrop job fixed its (before, after) pairs when it started, so
+        # files of the lot must not be renamed, rewritten or deleted (and the
+        # lot not switched) until it has finished or been cancelled
+        if self._recrop_stop is None:
+            return False
+        messagebox.showinfo(title, "A recrop is running. Wait for it to finish or cancel it first.")
+        return True
+
+    def _cancel_recrop(self):
+        if self._recrop_stop is not None:
+            self._recrop_stop.set()
+            self._recrop_label.configure(text="Cancelling…")
+
+    def _shutdown_recrop(self):
+        # Crops already being written finish; nothing new starts
+        if self._recrop_stop is not None:
+            self._recrop_stop.set()
+        self._recrop_pool.shutdown(wait=False, cancel_futures=True)
+
+    def _refresh_after(self, idx):
+        # Force a re-read: the file was just rewritten in place
+        cell = self._cells[self.right_frame][idx]
+        cell.key = None
+        self._show_in_cell(cell, self.after_paths[idx])
 
     def _clear_image_refs(self, frame):
-        for w in frame.grid_slaves():
-            # if a label was holding a PhotoImage, drop the reference
-            if hasattr(w, "image"):
-                w.image = None
-        gc.collect()
+        # drop PhotoImage references so Tk can free the bitmaps on close
+        for cell in self._cells.get(frame, []):
+            cell.set_image(None, "")
+            cell.key = None
 
     def _rebuild_after(self):
         self._build_group(self.right_frame, self.after_paths, selectable=True, is_after=True)
@@ -898,35 +1116,16 @@ class LotReviewWindow(tk.Toplevel):
         self._crop_selected()
 
     # ----- Reviewed-file helpers -----
-    def _reviewed_file_path(self):
-        if not self.out_dir:
-            return None
-        return os.path.join(self.out_dir, "reviewed.txt")
-
     def _append_reviewed(self, basenames):
-        """Append basenames (iterable) to reviewed.txt, avoiding duplicates."""
-        rf = self._reviewed_file_path()
-        if not rf:
+        """Record basenames (iterable) as reviewed for the current lot."""
+        if not self.out_dir:
             return
-        existing = set()
-        try:
-            with open(rf, "r", encoding="utf-8") as fh:
-                for ln in fh:
-                    ln = ln.strip()
-                    if ln:
-                        existing.add(os.path.basename(ln))
-        except FileNotFoundError:
-            pass
+        get_reviewed_store(self.out_dir).add(basenames, lot=self.lot_number)
 
-        to_add = [b for b in basenames if b not in existing]
-        if not to_add:
-            return
-        try:
-            with open(rf, "a", encoding="utf-8") as fh:
-                for b in to_add:
-                    fh.write(b + "\n")
-        except Exception:
-            pass
+    def _flush_reviewed(self):
+        # Marks are committed in batches; make sure the last ones are on disk
+        if self.out_dir:
+            get_reviewed_store(self.out_dir).flush()
 
     def _mark_current_lot_reviewed(self):
         """Mark all input images for current lot as reviewed (record basenames)."""
@@ -936,6 +1135,8 @@ class LotReviewWindow(tk.Toplevel):
         self._append_reviewed(basenames)
 
     def _mark_and_next(self, *a):
+        if self._recrop_running("Next Lot"):
+            return
         try:
             self._mark_current_lot_reviewed()
         except Exception:
@@ -944,6 +1145,8 @@ class LotReviewWindow(tk.Toplevel):
             self.on_next_lot()
 
     def _mark_and_prev(self, *a):
+        if self._recrop_running("Prev Lot"):
+            return
         try:
             self._mark_current_lot_reviewed()
         except Exception:
@@ -953,6 +1156,7 @@ class LotReviewWindow(tk.Toplevel):
 
     def _delete_selected(self):
         if not self._require_selection(): return
+        if self._recrop_running("Delete"): return
         idx = self._selected_idx
         path = self.after_paths[idx]
         base = os.path.basename(path)
@@ -965,6 +1169,7 @@ class LotReviewWindow(tk.Toplevel):
         except Exception as e:
             messagebox.showerror("Delete", f"Failed to delete: {e}")
             return
+        self._files_changed(path)
 
         # record as reviewed (so it will be skipped in future)
         try:
@@ -1,11 +1,18 @@
 import os
 import tkinter as tk
 from tkinter import ttk, filedialog, messagebox
-from autocropper.io_utils import group_images_by_lot, numeric_first_sort, normalize_output_dir, compute_already_cropped_lots, compute_uncropped_lots
+from autocropper.io_utils import FolderIndex, group_images_by_lot, numeric_first_sort, normalize_output_dir, compute_already_cropped_lots, compute_uncropped_lots
+from autocropper.renames import recover_renames
+from autocropper.watcher import FolderWatcher
 from autocropper.worker import run_cropper
+from autocropper.model import model_state, start_warm_up, default_jobs, MAX_DEFAULT_JOBS
 from autocropper.gui.review import ReviewController
 from autocropper.gui.exporter import ExportWindow
 
+# Keep review/export in sync with the folders through background watchers
+# (autocropper.watcher); False gives them one-off listings instead
+WATCH_FOLDERS = True
+
 class CropperGUI:
     def __init__(self, root):
         self.root = root
@@ -14,6 +21,9 @@ class CropperGUI:
 
         self.input_dir = tk.StringVar()
         self.output_dir = tk.StringVar()
+        self.jobs = tk.IntVar(value=1)  # worker processes; set from the model's device once loaded
+        self._watchers = []     # [input, output] FolderWatcher of the open session
+        self._watch_windows = set()     # open review/export windows using them
 
         root.columnconfigure(1, weight=1)
 
@@ -45,11 +55,35 @@ class CropperGUI:
 
         actions = ttk.Frame(root)
         actions.grid(row=3, column=0, columnspan=3, padx=8, pady=(12,8), sticky="ew")
-        ttk.Button(actions, text="Run Cropper⮩", command=self.run).pack(side="left", padx=6)
+        self.run_btn = ttk.Button(actions, text="Run Cropper⮩", command=self.run)
+        self.run_btn.pack(side="left", padx=6)
+        ttk.Label(actions, text="Processes:").pack(side="left", padx=(12, 2))
+        self.jobs_spin = ttk.Spinbox(actions, from_=1, to=max(MAX_DEFAULT_JOBS, os.cpu_count() or 1),
+                                     width=3, textvariable=self.jobs, state="disabled")
+        self.jobs_spin.pack(side="left")
         # Temporarily disable direct export button; feature does not fit current workflow
         # ttk.Button(actions, text="Export/Change Descriptions 🗊", command=self.skip_to_Export).pack(side="left", padx=6)
         ttk.Button(actions, text="Open Review 🖻", command=self.skip_to_Review).pack(side="right", padx=6)
 
+        # Load + warm up the model in the background while the user picks folders
+        start_warm_up()
+        self._poll_model_state()
+
+    def _poll_model_state(self):
+        """Reflect the background model load on the Run button until it settles."""
+        try:
+            if model_state.status in ("loading", "warming"):
+                self.run_btn.configure(text="Model loading…", state="disabled")
+                self.root.after(250, self._poll_model_state)
+                return
+            # ready, or failed: run() will retry the load and report the error.
+            # On a CPU-only machine default to several processes (jobs > 1)
+            self.run_btn.configure(text="Run Cropper⮩", state="normal")
+            self.jobs.set(default_jobs())
+            self.jobs_spin.configure(state="normal")
+        except tk.TclError:
+            pass
+
     def _toggle_filter(self):
         """Enable/disable filter folder controls based on checkbox."""
         pass
@@ -107,22 +141,64 @@ Step 4: Locate Exported Images
 
     def select_filter_folder(self):
         # deprecated: reviewed-file replaces filter folder
-        messagebox.showinfo("Reviewed File", "Filtering is now driven by reviewed.txt in the output folder.")
+        messagebox.showinfo(
+            "Reviewed File",
+            "Filtering is now driven by the reviewed list kept in the output folder "
+            "(.autocrop_reviewed.sqlite3; an older reviewed.txt is imported into it).",
+        )
 
     def _compute_lots(self, in_dir, out_dir):
-        gi = group_images_by_lot(in_dir)
-        go = group_images_by_lot(out_dir)
+        # in_dir/out_dir: folder paths or FolderIndex objects. With
+        # WATCH_FOLDERS, gi/go are live FolderWatcher maps that take over the
+        # indexes, so callers must be done reading them directly.
+        if WATCH_FOLDERS:
+            gi, go = self._watch_folders(in_dir, out_dir)
+        else:
+            gi = group_images_by_lot(in_dir)
+            go = group_images_by_lot(out_dir)
         all_ids = set(gi.keys()) | set(go.keys())
         return gi, go, numeric_first_sort(all_ids)
 
-    def _get_skip_lots(self):
-        """Compute lots to skip based on reviewed file in the output folder."""
+    def _watch_folders(self, in_dir, out_dir):
+        """Start watchers for a new review/export session, stopping the previous ones."""
+        self._stop_watchers()
+        self._watchers = [FolderWatcher(in_dir).start(), FolderWatcher(out_dir).start()]
+        return self._watchers
+
+    def _stop_watchers(self):
+        for watcher in self._watchers:
+            watcher.stop()
+        self._watchers = []
+        self._watch_windows = set()
+
+    def _hold_watchers(self, window):
+        # The session's watchers run while any of its windows is open; in
+        # polling mode each one lists its folder every few seconds
+        if not self._watchers:
+            return
+        self._watch_windows.add(window)
+        watchers = self._watchers
+
+        def on_destroy(event):
+            # A window of an earlier session leaves the current watchers alone
+            if event.widget is not window or self._watchers is not watchers:
+                return
+            self._watch_windows.discard(window)
+            if not self._watch_windows:
+                self._stop_watchers()
+        window.bind("<Destroy>", on_destroy, add="+")
+
+    def _get_skip_lots(self, in_index=None, out_index=None):
+        """
+        Compute lots to skip based on reviewed file in the output folder.
+        Pass FolderIndex objects the caller already has to avoid relisting.
+        """
         out_dir = self.output_dir.get()
         if not out_dir or not os.path.isdir(out_dir):
             print("[resume] no output folder yet, skipping resume")
             return set()
         print(f"[resume] using reviewed file in: {out_dir}")
-        return compute_already_cropped_lots(self.input_dir.get(), out_dir)
+        return compute_already_cropped_lots(in_index or self.input_dir.get(), out_index or out_dir)
 
     def run(self):
         in_dir = self.input_dir.get()
@@ -141,32 +217,44 @@ Step 4: Locate Exported Images
                 pass
             self.output_dir.set(out_dir)
 
+        # Finish (or undo) renames a previous session was killed in the middle
+        # of, before deciding what is already cropped
+        recover_renames(out_dir)
+
+        # Each folder is listed once; the input doesn't change during the run
+        # and the output index is rescanned once after cropping
+        in_index = FolderIndex(in_dir)
+        out_index = FolderIndex(out_dir)
+
         # For the cropping run we only want to consider what is already present
-        # in the output folder (ignore reviewed.txt). For the later review step
+        # in the output folder (ignore the reviewed list). For the later review step
         # we will re-evaluate skips including reviewed entries.
-        skip_lots_for_crop = compute_already_cropped_lots(in_dir, out_dir, include_reviewed=False)
+        skip_lots_for_crop = compute_already_cropped_lots(in_index, out_index, include_reviewed=False)
         if skip_lots_for_crop:
             print(f"[resume] (crop) skipping lots: {sorted(skip_lots_for_crop)}")
 
         def after_crop():
+            out_index.scan()
             # normalize output dir filenames
-            renamed = normalize_output_dir(out_dir)
+            renamed = normalize_output_dir(out_index)
             print(f"[normalize] renamed {renamed} files")
 
-            gi, go, lot_list = self._compute_lots(in_dir, out_dir)
-
-            # For review, re-evaluate skips including reviewed.txt so reviewed
+            # For review, re-evaluate skips including the reviewed list so reviewed
             # entries are honored when showing the review window.
-            skip_lots = self._get_skip_lots()
+            skip_lots = self._get_skip_lots(in_index, out_index)
+
+            gi, go, lot_list = self._compute_lots(in_index, out_index)
             if skip_lots:
                 lot_list = [lot for lot in lot_list if lot not in skip_lots]
 
             if not lot_list:
+                self._stop_watchers()
                 messagebox.showinfo("SUCCESS!", "All lots have already been cropped.")
                 self.root.deiconify()
                 return
 
-            ReviewController(self.root, lot_list, gi, go, self.begin_Export, out_dir=out_dir)
+            review = ReviewController(self.root, lot_list, gi, go, self.begin_Export, out_dir=out_dir)
+            self._hold_watchers(review.win)
             messagebox.showinfo(
                 "SUCCESS! Processing Complete",
                 f"Cropped images saved to:\n{out_dir}"
@@ -176,11 +264,22 @@ Step 4: Locate Exported Images
         # ensure output folder exists
         try: os.makedirs(out_dir, exist_ok=True)
         except Exception: pass
-        run_cropper(in_dir, out_dir, self.root, after_crop, skip_lots=skip_lots_for_crop)
+        try:
+            jobs = max(1, int(self.jobs.get()))
+        except (tk.TclError, ValueError):
+            jobs = 1
+        run_cropper(in_index, out_dir, self.root, after_crop, skip_lots=skip_lots_for_crop, jobs=jobs)
+
+    def _output_lots(self, out_dir):
+        # The output folder watcher of the current session, if it watches out_dir
+        if self._watchers and self._watchers[1].folder == out_dir:
+            return self._watchers[1]
+        return None
 
     def begin_Export(self, lot_list):
         out_dir = self.output_dir.get()
-        ExportWindow(self.root, lot_list, out_dir)
+        export = ExportWindow(self.root, lot_list, out_dir, lots=self._output_lots(out_dir))
+        self._hold_watchers(export)
 
     def skip_to_Export(self):
         in_dir = self.input_dir.get()
@@ -194,11 +293,13 @@ Step 4: Locate Exported Images
             out_dir = os.path.join(parent, f"Cropped_{base}")
             try: os.makedirs(out_dir, exist_ok=True)
             except Exception: pass
-        renamed = normalize_output_dir(out_dir)
+        out_index = FolderIndex(out_dir)
+        renamed = normalize_output_dir(out_index)
         print(f"[normalize] renamed {renamed} files")
-        gi, go, lot_list = self._compute_lots(in_dir, out_dir)
+        gi, go, lot_list = self._compute_lots(in_dir, out_index)
         self.root.withdraw()
-        ExportWindow(self.root, lot_list, out_dir)  # pass out_dir
+        export = ExportWindow(self.root, lot_list, out_dir, lots=self._output_lots(out_dir))  # pass out_dir
+        self._hold_watchers(export)
 
     def skip_to_Review(self):
         in_dir = self.input_dir.get()
@@ -213,21 +314,25 @@ Step 4: Locate Exported Images
             try: os.makedirs(out_dir, exist_ok=True)
             except Exception: pass
 
-        renamed = normalize_output_dir(out_dir)
+        in_index = FolderIndex(in_dir)
+        out_index = FolderIndex(out_dir)
+        renamed = normalize_output_dir(out_index)
         print(f"[normalize] renamed {renamed} files")
 
-        gi, go, lot_list = self._compute_lots(in_dir, out_dir)
-
         # Compute lots to skip based on reviewed file
-        skip_lots = self._get_skip_lots()
+        skip_lots = self._get_skip_lots(in_index, out_index)
+
+        gi, go, lot_list = self._compute_lots(in_index, out_index)
         if skip_lots:
             lot_list = [lot for lot in lot_list if lot not in skip_lots]
             print(f"[resume] skipping lots: {sorted(skip_lots)}")
 
         # Check if lot_list is empty after filtering
         if not lot_list:
+            self._stop_watchers()
             messagebox.showinfo("Review", "All lots have already been cropped.")
             return
 
         self.root.withdraw()
-        ReviewController(self.root, lot_list, gi, go, self.begin_Export, out_dir=out_dir)
\ No newline at end of file
+        review = ReviewController(self.root, lot_list, gi, go, self.begin_Export, out_dir=out_dir)
+        self._hold_watchers(review.win)
\ No newline at end of file
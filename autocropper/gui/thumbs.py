@@ -0,0 +1,251 @@
+"""
+Thumbnail cache for the review window.
+
+Every image gets a small pyramid of thumbnails (PYRAMID_LEVELS, long side in
+pixels) built from a single decode. A thumbnail of any size is scaled in
+memory from the smallest level that is at least as large, so resizing the
+review window never touches the disk or the full-size photo again.
+
+Thumbnails are kept in two tiers:
+  - an in-memory LRU (bounded in bytes) of pyramid levels and of the scaled
+    thumbnails handed out by get() (ready to be wrapped in an
+    ImageTk.PhotoImage on the Tk thread)
+  - an on-disk cache of every pyramid level as small JPEGs in THUMB_DIRNAME
+    inside the output folder, so reopening a sale doesn't decode every
+    full-size photo again
+
+Entries are keyed by the file's absolute path, mtime, size and inode plus the
+thumbnail size or pyramid level; the inode keeps two renumbered files that
+swapped names from showing each other's thumbnail. Code that rewrites an image (rotate, crop,
+revert, recrop, delete, renumber) calls invalidate(path) so a stale thumbnail
+is never shown even when the new file has the same mtime and size.
+
+Safe to use from several threads; only photo() must run on the Tk thread.
+"""
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+
+from PIL import Image, ImageTk
+
+THUMB_DIRNAME = ".autocrop_thumbs"
+THUMB_MEMORY_MB = 320           # in-memory LRU capacity (decoded pixels)
+THUMB_DISK_MAX_FILES = 20000    # disk cache is pruned to 80% of this on open
+THUMB_JPEG_QUALITY = 90
+PYRAMID_LEVELS = (256, 512)     # long side of each level, smallest first;
+                                # review thumbnails are 80-320 px
+
+_caches = {}
+_caches_lock = threading.Lock()
+
+def get_thumb_cache(out_dir):
+    """The (per-process) ThumbnailCache for an output folder; memory-only without one."""
+    folder = os.path.abspath(out_dir) if out_dir else None
+    with _caches_lock:
+        cache = _caches.get(folder)
+        if cache is None:
+            cache = ThumbnailCache(os.path.join(folder, THUMB_DIRNAME) if folder else None)
+            _caches[folder] = cache
+        return cache
+
+def _path_hash(path):
+    return hashlib.sha1(os.path.normcase(path).encode("utf-8", "surrogatepass")).hexdigest()[:20]
+
+def load_thumbnail(path, size):
+    """Decode ``path`` straight to a thumbnail fitting ``size`` (w, h)."""
+    with Image.open(path) as im:
+        # JPEG: let libjpeg scale down while decoding (1/2..1/8)
+        im.draft("RGB", size)
+        im.thumbnail(size)
+        if im.mode not in ("RGB", "L"):
+            im = im.convert("RGB")
+        im.load()
+        return im
+
+def pyramid_level(size):
+    """The smallest pyramid level a thumbnail fitting ``size`` can be scaled from."""
+    side = max(size)
+    for level in PYRAMID_LEVELS:
+        if level >= side:
+            return level
+    return PYRAMID_LEVELS[-1]
+
+def fit_image(im, size):
+    """``im`` scaled down to fit ``size`` like Image.thumbnail (never enlarged)."""
+    w, h = im.size
+    scale = min(size[0] / w, size[1] / h, 1.0)
+    new_size = (max(1, round(w * scale)), max(1, round(h * scale)))
+    if new_size == im.size:
+        return im
+    return im.resize(new_size, Image.LANCZOS, reducing_gap=2.0)
+
+def _nbytes(im):
+    return im.width * im.height * len(im.getbands())
+
+class ThumbnailCache:
+    def __init__(self, cache_dir=None, max_bytes=THUMB_MEMORY_MB * 1024 * 1024):
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._memory = OrderedDict()    # key -> PIL image
+        self._memory_bytes = 0
+        self._disk_index = None         # path hash -> set of filenames (lazy)
+        self.hits = 0
+        self.misses = 0
+
+    # --- keys ---------------------------------------------------------------
+
+    @staticmethod
+    def _identity(path):
+        st = os.stat(path)
+        return (st.st_mtime_ns, st.st_size, st.st_ino)
+
+    def _disk_name(self, path, identity, level):
+        mtime_ns, nbytes, ino = identity
+        return f"{_path_hash(path)}-{mtime_ns}-{nbytes}-{ino}-L{level}.jpg"
+
+    def _index(self):
+        # Built once from a directory scan; kept in sync by put/invalidate
+        if self._disk_index is None:
+            self._disk_index = {}
+            if self.cache_dir:
+                try:
+                    entries = sorted(os.scandir(self.cache_dir), key=lambda e: e.stat().st_mtime)
+                except OSError:
+                    entries = []
+                # Prune the oldest entries when the folder has grown too big
+                excess = len(entries) - int(THUMB_DISK_MAX_FILES * 0.8)
+                if len(entries) > THUMB_DISK_MAX_FILES:
+                    for e in entries[:excess]:
+                        try:
+                            os.remove(e.path)
+                        except OSError:
+                            pass
+                    entries = entries[excess:]
+                for e in entries:
+                    self._disk_index.setdefault(e.name.split("-", 1)[0], set()).add(e.name)
+        return self._disk_index
+
+    # --- lookups ------------------------------------------------------------
+
+    def get(self, path, size):
+        """
+        Thumbnail of ``path`` fitting ``size`` as a PIL image (shared: don't
+        modify it), or None when the file is missing or unreadable.
+        """
+        path = os.path.abspath(path)
+        size = (int(size[0]), int(size[1]))
+        try:
+            identity = self._identity(path)
+        except OSError:
+            return None
+        key = (path, identity, size)
+
+        with self._lock:
+            im = self._memory.get(key)
+            if im is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return im
+
+        base = self._level(path, identity, pyramid_level(size))
+        if base is None:
+            return None
+        im = fit_image(base, size)
+        with self._lock:
+            self._remember(key, im)
+        return im
+
+    def _level(self, path, identity, level):
+        # One pyramid level: memory, then disk, then (re)build the whole pyramid
+        key = (path, identity, "L", level)
+        with self._lock:
+            im = self._memory.get(key)
+            if im is not None:
+                self._memory.move_to_end(key)
+                self.hits += 1
+                return im
+            name = self._disk_name(path, identity, level)
+            on_disk = self.cache_dir and name in self._index().get(name.split("-", 1)[0], ())
+
+        im = None
+        if on_disk:
+            try:
+                im = load_thumbnail(os.path.join(self.cache_dir, name), (level, level))
+            except Exception:
+                im = None
+        if im is not None:
+            with self._lock:
+                self.hits += 1
+                self._remember(key, im)
+            return im
+
+        try:
+            levels = self._build(path)
+        except Exception:
+            return None
+        with self._lock:
+            self.misses += 1
+            for lv, lv_im in levels.items():
+                self._remember((path, identity, "L", lv), lv_im)
+        for lv, lv_im in levels.items():
+            self._store_disk(path, self._disk_name(path, identity, lv), lv_im)
+        return levels[level]
+
+    @staticmethod
+    def _build(path):
+        # A single (draft-reduced) decode for the largest level; each smaller
+        # level is scaled from the one above it
+        levels = {}
+        im = load_thumbnail(path, (PYRAMID_LEVELS[-1], PYRAMID_LEVELS[-1]))
+        for level in reversed(PYRAMID_LEVELS):
+            im = fit_image(im, (level, level))
+            levels[level] = im
+        return levels
+
+    def _remember(self, key, im):
+        # Caller holds self._lock
+        old = self._memory.pop(key, None)
+        if old is not None:
+            self._memory_bytes -= _nbytes(old)
+        self._memory[key] = im
+        self._memory_bytes += _nbytes(im)
+        while self._memory_bytes > self.max_bytes and len(self._memory) > 1:
+            _key, dropped = self._memory.popitem(last=False)
+            self._memory_bytes -= _nbytes(dropped)
+
+    def photo(self, path, size, master):
+        """get() wrapped in a PhotoImage for ``master`` (Tk thread only), or None."""
+        im = self.get(path, size)
+        return ImageTk.PhotoImage(im, master=master) if im is not None else None
+
+    def _store_disk(self, path, name, im):
+        if not self.cache_dir:
+            return
+        try:
+            os.makedirs(self.cache_dir, exist_ok=True)
+            tmp = os.path.join(self.cache_dir, f".{name}.{threading.get_ident()}.tmp")
+            im.save(tmp, "JPEG", quality=THUMB_JPEG_QUALITY)
+            os.replace(tmp, os.path.join(self.cache_dir, name))
+        except OSError as e:
+            print(f"[thumbs] could not cache thumbnail for {path}: {e}")
+            return
+        with self._lock:
+            self._index().setdefault(name.split("-", 1)[0], set()).add(name)
+
+    # --- invalidation -------------------------------------------------------
+
+    def invalidate(self, *paths):
+        """Forget every cached thumbnail (any size) of the given files."""
+        for path in paths:
+            path = os.path.abspath(path)
+            with self._lock:
+                for key in [k for k in self._memory if k[0] == path]:
+                    self._memory_bytes -= _nbytes(self._memory.pop(key))
+                names = self._index().pop(_path_hash(path), set())
+            for name in names:
+                try:
+                    os.remove(os.path.join(self.cache_dir, name))
+                except OSError:
+                    pass
@@ -2,7 +2,11 @@ import csv
 import os
 import re
 from collections import defaultdict
-from typing import Dict, List, Optional, Tuple, Iterable, Set
+from functools import lru_cache
+from typing import Dict, List, NamedTuple, Optional, Tuple, Iterable, Set, Union
+
+from autocropper.renames import apply_renames, recover_renames
+from autocropper.reviewed import get_reviewed_store
 
 # -------------------------------
 # Filename parsing & schemes
@@ -16,13 +20,19 @@ from typing import Dict, List, Optional, Tuple, Iterable, Set
 
 _LOT = r"(?P<lot>\d+[A-Za-z]*)"
 _EXT = r"(?P<ext>jpe?g|png)"
-_IDX = r"(?P<idx>\d+)"
 
-_PAREN_IDX = re.compile(rf"^{_LOT}\s*\(({_IDX})\)\.({_EXT})$", re.IGNORECASE)
-_UNDER_IDX = re.compile(rf"^{_LOT}\s*_{_IDX}\.({_EXT})$", re.IGNORECASE)
-_HYPH_IDX  = re.compile(rf"^{_LOT}\s*-{_IDX}\.({_EXT})$", re.IGNORECASE)
-_BARE      = re.compile(rf"^{_LOT}\.({_EXT})$", re.IGNORECASE)
+# One pass for all schemes: the index group that matched names the scheme
+_IMAGE_NAME = re.compile(
+    rf"^{_LOT}(?:\s*\((?P<paren>\d+)\)|\s*_(?P<under>\d+)|\s*-(?P<hyphen>\d+))?\.{_EXT}$",
+    re.IGNORECASE,
+)
+
+# Parsed names kept by parse_image_name (a few sales' worth of files)
+PARSE_CACHE_SIZE = 65536
 
+# Memoized on the argument as given: the GUI asks about the same paths over
+# and over, and os.path.basename costs more than a cache hit
+@lru_cache(maxsize=PARSE_CACHE_SIZE)
 def parse_image_name(path_or_name: str) -> Optional[Tuple[str, int, str, str]]:
     """
     Return (lot, idx, scheme, ext) or None if not a supported image.
@@ -30,25 +40,15 @@ def parse_image_name(path_or_name: str) -> Optional[Tuple[str, int, str, str]]:
     scheme in {"bare","paren","under","hyphen"}.
     ext includes extension without dot, lowercase (e.g., 'jpg').
     """
-    name = os.path.basename(path_or_name)
-
-    m = _PAREN_IDX.match(name)
-    if m:
-        return m.group("lot"), int(m.group("idx")), "paren", m.group(3).lower()
-
-    m = _UNDER_IDX.match(name)
-    if m:
-        return m.group("lot"), int(m.group("idx")), "under", m.group(3).lower()
-
-    m = _HYPH_IDX.match(name)
-    if m:
-        return m.group("lot"), int(m.group("idx")), "hyphen", m.group(3).lower()
-
-    m = _BARE.match(name)
-    if m:
-        return m.group("lot"), 0, "bare", m.group(2).lower()
-
-    return None
+    m = _IMAGE_NAME.match(os.path.basename(path_or_name))
+    if not m:
+        return None
+    lot, ext = m.group("lot"), m.group("ext").lower()
+    for scheme in ("paren", "under", "hyphen"):
+        idx = m.group(scheme)
+        if idx is not None:
+            return lot, int(idx), scheme, ext
+    return lot, 0, "bare", ext
 
 def display_order_for_path(path_or_name: str) -> Optional[int]:
     """
@@ -74,29 +74,135 @@ def sort_paths_by_index(paths: Iterable[str]) -> List[str]:
         return (1, 10**9, os.path.basename(p).lower())
     return sorted(paths, key=key)
 
+# -------------------------------
+# Folder index
+# -------------------------------
+
+class ImageRecord(NamedTuple):
+    path: str
+    name: str
+    lot: str
+    idx: int
+    scheme: str
+    ext: str
+    size: int
+    mtime: float
+
+class FolderIndex:
+    """
+    The supported images of one folder, listed with a single os.scandir pass
+    and parsed once. Every function below that takes a folder also accepts a
+    FolderIndex, so one listing can serve a whole run instead of each call
+    listing (and parsing) the folder again; this matters on network shares.
+
+    The index does not watch the folder (see autocropper.watcher for that).
+    Call scan() after something else wrote to it, refresh(*paths) after
+    touching a few files, and apply_renames(plan) after renaming
+    (normalize_output_dir does this itself). Not thread-safe on its own.
+    """
+
+    def __init__(self, folder: str):
+        self.folder = folder
+        self.records: Dict[str, ImageRecord] = {}   # basename -> record
+        self.names: Set[str] = set()                # every entry, images or not
+        self._lots: Dict[str, Dict[str, None]] = {} # lot -> basenames (ordered set)
+        self.scan()
+
+    def scan(self) -> None:
+        """(Re)list the whole folder."""
+        self.records = {}
+        self.names = set()
+        self._lots = {}
+        try:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    self.names.add(entry.name)
+                    if entry.is_file():
+                        self._add(entry.name, entry.path, entry.stat)
+        except FileNotFoundError:
+            pass
+
+    def _add(self, name: str, path: str, stat) -> None:
+        parsed = parse_image_name(name)
+        if not parsed:
+            return
+        try:
+            st = stat()
+        except OSError:
+            return
+        lot, idx, scheme, ext = parsed
+        self._put(ImageRecord(path, name, lot, idx, scheme, ext, st.st_size, st.st_mtime))
+
+    def _put(self, rec: ImageRecord) -> None:
+        self.records[rec.name] = rec
+        self._lots.setdefault(rec.lot, {})[rec.name] = None
+
+    def _remove(self, name: str) -> Optional[ImageRecord]:
+        self.names.discard(name)
+        rec = self.records.pop(name, None)
+        if rec is not None:
+            names = self._lots[rec.lot]
+            del names[name]
+            if not names:
+                del self._lots[rec.lot]
+        return rec
+
+    def refresh(self, *paths: str) -> None:
+        """Re-stat the given files of this folder (added, changed or removed)."""
+        for path in paths:
+            name = os.path.basename(path)
+            full = os.path.join(self.folder, name)
+            self._remove(name)
+            if os.path.lexists(full):
+                self.names.add(name)
+                if os.path.isfile(full):
+                    self._add(name, full, lambda: os.stat(full))
+
+    def apply_renames(self, plan: Dict[str, str]) -> None:
+        """Move records after {src_abs: dst_abs} was applied on disk; no I/O."""
+        moved = [(self._remove(os.path.basename(src)), dst) for src, dst in plan.items()]
+        for rec, dst in moved:
+            name = os.path.basename(dst)
+            self.names.add(name)
+            parsed = parse_image_name(name)
+            if rec is not None and parsed:
+                lot, idx, scheme, ext = parsed
+                self._put(rec._replace(
+                    path=os.path.join(self.folder, name), name=name,
+                    lot=lot, idx=idx, scheme=scheme, ext=ext,
+                ))
+
+    def lots(self) -> List[str]:
+        """Lot ids present in the folder (unsorted)."""
+        return list(self._lots)
+
+    def lot_paths(self, lot: str) -> List[str]:
+        """Image paths of one lot, bare first then 1, 2, 3...; KeyError if absent."""
+        recs = [self.records[name] for name in self._lots[lot]]
+        return [r.path for r in sorted(recs, key=lambda r: r.idx)]
+
+    def by_lot(self) -> Dict[str, List[str]]:
+        """{ lot_id: [image paths, bare first then 1, 2, 3...] } (a fresh copy)."""
+        return {lot: self.lot_paths(lot) for lot in self._lots}
+
+FolderLike = Union[str, FolderIndex]
+
+def _as_index(folder: FolderLike) -> FolderIndex:
+    return folder if isinstance(folder, FolderIndex) else FolderIndex(folder)
+
+def _folder_path(folder: FolderLike) -> str:
+    return folder.folder if isinstance(folder, FolderIndex) else folder
+
 # -------------------------------
 # Grouping & lot sorting
 # -------------------------------
 
-def group_images_by_lot(folder: str) -> Dict[str, List[str]]:
+def group_images_by_lot(folder: FolderLike) -> Dict[str, List[str]]:
     """
-    Returns { lot_id(str): [sorted image paths...] } for all images in a folder.
-    Distinguishes '6' vs '6a' vs '6b', etc.
+    Returns { lot_id(str): [sorted image paths...] } for all images in a folder
+    (a path or a FolderIndex). Distinguishes '6' vs '6a' vs '6b', etc.
     """
-    lot_dict: Dict[str, List[str]] = defaultdict(list)
-    try:
-        for fname in os.listdir(folder):
-            parsed = parse_image_name(fname)
-            if not parsed:
-                continue
-            lot, _idx, _scheme, _ext = parsed
-            lot_dict[lot].append(os.path.join(folder, fname))
-    except FileNotFoundError:
-        pass
-
-    for lot, arr in lot_dict.items():
-        lot_dict[lot] = sort_paths_by_index(arr)
-    return lot_dict
+    return defaultdict(list, _as_index(folder).by_lot())
 
 _LOT_SPLIT = re.compile(r"^(\d+)([A-Za-z]*)$")
 
@@ -209,95 +315,64 @@ def compute_export_renames_for_lot(paths: List[str]) -> Dict[str, str]:
 
     return plan
 
-def _apply_renames(plan: Dict[str, str]) -> None:
+def _apply_renames(plan: Dict[str, str], names: Optional[Set[str]] = None) -> Dict[str, str]:
     """
-    Safely apply {src_abs: dst_abs} with cycle breaking via temp names.
+    Safely apply {src_abs: dst_abs} with cycle breaking via temp names,
+    journaled so an interrupted batch is finished or undone later (see
+    autocropper.renames). ``names``: entries already in the folder, if known.
+    Returns the renames applied (missing sources are skipped).
     """
     if not plan:
-        return
-
-    folder = None
-    temps = {}
-    used = set()
-
-    # Collect folder & used names
-    for src, dst in plan.items():
-        folder = folder or os.path.dirname(src)
-        used.add(os.path.basename(src))
-        used.add(os.path.basename(dst))
-
-    def _temp_for(dst_path: str) -> str:
-        base = os.path.basename(dst_path)
-        stem, ext = os.path.splitext(base)
-        k = 0
-        while True:
-            tmp = f"{stem}.__tmp__{k}{ext}"
-            if tmp not in used:
-                used.add(tmp)
-                return os.path.join(folder, tmp)  # type: ignore
-            k += 1
-
-    # Phase 1: move to temps
-    for src, dst in plan.items():
-        if os.path.exists(src):
-            tmp = _temp_for(dst)
-            os.replace(src, tmp)
-            temps[tmp] = dst
-
-    # Phase 2: temps -> final
-    for tmp, dst in temps.items():
-        os.replace(tmp, dst)
-
-def normalize_output_dir(out_dir: str) -> int:
+        return {}
+    return apply_renames(plan, names)
+
+def normalize_output_dir(out_dir: FolderLike) -> int:
     """
-    For every lot in out_dir, enforce the export filename policy on disk.
-    Returns number of files renamed.
+    For every lot in out_dir (a path or a FolderIndex, which is kept up to
+    date), enforce the export filename policy on disk. All lots are renamed
+    in one journaled batch. Returns number of files renamed.
     """
-    count = 0
-    groups = group_images_by_lot(out_dir)
-    for _lot, files in groups.items():
-        plan = compute_export_renames_for_lot(files)
-        if plan:
-            _apply_renames(plan)
-            count += len(plan)
-    return count
+    # An interrupted earlier batch leaves files under temp names; fix that first
+    if recover_renames(_folder_path(out_dir)) and isinstance(out_dir, FolderIndex):
+        out_dir.scan()
+    index = _as_index(out_dir)
+    plan: Dict[str, str] = {}
+    for _lot, files in index.by_lot().items():
+        plan.update(compute_export_renames_for_lot(files))
+    applied = _apply_renames(plan, names=index.names)
+    index.apply_renames(applied)
+    return len(applied)
 
 
-def compute_already_cropped_lots(input_dir: str, output_dir: str, include_reviewed: bool = True) -> Set[str]:
+def compute_already_cropped_lots(input_dir: FolderLike, output_dir: FolderLike, include_reviewed: bool = True) -> Set[str]:
     """
-    Compare input and output directories to find lots that are already complete.
+    Compare input and output directories (paths or FolderIndex objects) to find
+    lots that are already complete.
 
     If ``include_reviewed`` is True (default) then the function will also consult
-    ``output_dir/reviewed.txt`` — entries listed there count as already-processed
-    (useful for skipping previously-reviewed images). If ``include_reviewed`` is
-    False, the reviewed file is ignored and only files physically present in the
-    output folder are considered.
+    the output folder's reviewed-state store (autocropper.reviewed, which also
+    picks up a legacy ``reviewed.txt``) — entries recorded there count as
+    already-processed (useful for skipping previously-reviewed images). If
+    ``include_reviewed`` is False, reviewed state is ignored and only files
+    physically present in the output folder are considered.
 
     Logic (same in both modes):
       - For each lot that appears in input_dir:
           input_count = number of image files for that lot in input_dir
           accounted = number of those files either present in output_dir or (optionally)
-                     listed in reviewed.txt
+                     recorded as reviewed
 
         If accounted == input_count: that lot is considered done.
 
     Returns a set of lot IDs that can be skipped.
     """
-    input_groups = group_images_by_lot(input_dir)
-    output_groups = group_images_by_lot(output_dir)
+    input_groups = _as_index(input_dir).by_lot()
+    output_groups = _as_index(output_dir).by_lot()
 
-    # read reviewed entries (one-per-line basenames) from output_dir/reviewed.txt
-    reviewed = set()
-    if include_reviewed:
-        reviewed_file = os.path.join(output_dir, "reviewed.txt")
-        try:
-            with open(reviewed_file, "r", encoding="utf-8") as fh:
-                for ln in fh:
-                    ln = ln.strip()
-                    if ln:
-                        reviewed.add(os.path.basename(ln))
-        except FileNotFoundError:
-            pass
+    # reviewed basenames (loaded once per process per output folder)
+    reviewed: Set[str] = set()
+    if include_reviewed and os.path.isdir(_folder_path(output_dir)):
+        reviewed = get_reviewed_store(_folder_path(output_dir)).names
 
     done: Set[str] = set()
 
@@ -306,7 +381,7 @@ def compute_already_cropped_lots(input_dir: str, output_dir: str, include_review
 
         # Count inputs that are present in output. If include_reviewed is True,
         # require that the file is both present in the output folder and
-        # recorded in reviewed.txt (i.e., both conditions must be true).
+        # recorded as reviewed (i.e., both conditions must be true).
         accounted = 0
         out_files_for_lot = {os.path.basename(p) for p in output_groups.get(lot, [])}
         for p in input_files:
@@ -326,7 +401,7 @@ def compute_already_cropped_lots(input_dir: str, output_dir: str, include_review
     return done
 
 
-def compute_uncropped_lots(input_dir: str, output_dir: str) -> Set[str]:
+def compute_uncropped_lots(input_dir: FolderLike, output_dir: FolderLike) -> Set[str]:
     """
     Return the set of lot IDs from ``input_dir`` that are NOT yet fully cropped
     based solely on files present in ``output_dir`` (ignores reviewed.txt).
@@ -335,7 +410,8 @@ def compute_uncropped_lots(input_dir: str, output_dir: str) -> Set[str]:
     ``compute_already_cropped_lots(input_dir, output_dir, include_reviewed=False)``
     and returning the complement (input lots minus done lots).
     """
-    input_groups = group_images_by_lot(input_dir)
+    input_dir = _as_index(input_dir)
+    input_groups = input_dir.by_lot()
     done = compute_already_cropped_lots(input_dir, output_dir, include_reviewed=False)
     # uncropped = lots present in input but not marked done
     return {lot for lot in input_groups.keys() if lot not in done}
\ No newline at end of file
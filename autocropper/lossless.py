@@ -0,0 +1,137 @@
+"""
+Lossless JPEG crop and rotate through the jpegtran command line tool.
+
+jpegtran works on the DCT coefficients, so a crop or a 90-degree rotation
+needs no decode, no re-encode and loses no quality however often it is
+repeated. Crop edges must fall on MCU (minimum coded unit) boundaries, so
+crop_jpeg() widens the box outward to the nearest MCU edge (8 or 16 px,
+depending on chroma subsampling) before cutting.
+
+jpegtran is optional: it is looked up next to the package (for bundled
+builds) and then on PATH. Every entry point returns False instead of
+raising when the lossless path does not apply (no jpegtran, not a JPEG, an
+EXIF orientation the caller's coordinates don't match, jpegtran failing);
+callers then fall back to decoding and re-encoding.
+"""
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+
+from PIL import Image
+
+JPEGTRAN_NAME = "jpegtran.exe" if os.name == "nt" else "jpegtran"
+JPEG_EXTS = (".jpg", ".jpeg")
+
+_jpegtran = None
+_jpegtran_searched = False
+_search_lock = threading.Lock()
+
+def find_jpegtran():
+    """Path of the jpegtran executable, or None. Searched once per process."""
+    global _jpegtran, _jpegtran_searched
+    with _search_lock:
+        if not _jpegtran_searched:
+            if getattr(sys, "frozen", False):
+                base_dir = sys._MEIPASS
+            else:
+                base_dir = os.path.dirname(os.path.abspath(__file__))
+            bundled = os.path.join(base_dir, JPEGTRAN_NAME)
+            _jpegtran = bundled if os.path.isfile(bundled) else shutil.which("jpegtran")
+            _jpegtran_searched = True
+        return _jpegtran
+
+def jpeg_layout(path):
+    """
+    (mcu_w, mcu_h, width, height, orientation) of a baseline/progressive JPEG
+    read from its header, or None if ``path`` is not a readable JPEG.
+    """
+    try:
+        with Image.open(path) as im:
+            if im.format != "JPEG":
+                return None
+            # layer: (component id, h sampling, v sampling, qtable) per component
+            h_max = max((layer[1] for layer in im.layer), default=1)
+            v_max = max((layer[2] for layer in im.layer), default=1)
+            orientation = im.getexif().get(0x0112, 1)
+            return 8 * h_max, 8 * v_max, im.width, im.height, orientation
+    except Exception:
+        return None
+
+def snap_box(box, mcu_w, mcu_h, width, height):
+    """Grow (x1, y1, x2, y2) outward to MCU edges, clipped to the image."""
+    x1, y1, x2, y2 = box
+    x1 -= x1 % mcu_w
+    y1 -= y1 % mcu_h
+    x2 = min(width, x1 + -(-(x2 - x1) // mcu_w) * mcu_w)
+    y2 = min(height, y1 + -(-(y2 - y1) // mcu_h) * mcu_h)
+    return x1, y1, x2, y2
+
+def _run_jpegtran(args, src, dst):
+    # Write next to dst first so dst is never left half-written, and so
+    # src == dst (in-place rotate) works
+    exe = find_jpegtran()
+    if exe is None:
+        return False
+    fd, tmp = tempfile.mkstemp(suffix=".jpg", prefix=".jpegtran-", dir=os.path.dirname(os.path.abspath(dst)))
+    os.close(fd)
+    try:
+        proc = subprocess.run(
+            [exe, *args, "-outfile", tmp, src],
+            stdout=subprocess.DEVNULL,
+            stderr=subprocess.PIPE,
+            creationflags=getattr(subprocess, "CREATE_NO_WINDOW", 0),
+        )
+        if proc.returncode != 0 or os.path.getsize(tmp) == 0:
+            return False
+        os.replace(tmp, dst)
+        return True
+    except OSError as e:
+        print(f"[lossless] jpegtran failed on {src}: {e}")
+        return False
+    finally:
+        if os.path.exists(tmp):
+            try:
+                os.remove(tmp)
+            except OSError:
+                pass
+
+def crop_jpeg(src, dst, box=None):
+    """
+    Losslessly write ``box`` (x1, y1, x2, y2, in pixels as displayed) of the
+    JPEG ``src`` to ``dst``, snapped outward to MCU edges; box=None copies the
+    whole image. Metadata is dropped, like a re-encode would. Returns False
+    when the caller should re-encode instead.
+    """
+    if not src.lower().endswith(JPEG_EXTS) or find_jpegtran() is None:
+        return False
+    layout = jpeg_layout(src)
+    # Boxes come from EXIF-rotated decodes; jpegtran sees the stored pixels
+    if layout is None or layout[4] != 1:
+        return False
+    mcu_w, mcu_h, width, height, _orientation = layout
+
+    args = ["-copy", "none"]
+    if box is not None:
+        x1, y1, x2, y2 = snap_box(tuple(int(v) for v in box), mcu_w, mcu_h, width, height)
+        if x2 <= x1 or y2 <= y1:
+            return False
+        args += ["-crop", f"{x2 - x1}x{y2 - y1}+{x1}+{y1}"]
+    return _run_jpegtran(args, src, dst)
+
+def rotate_jpeg(path, degrees):
+    """
+    Rotate the JPEG at ``path`` in place by ``degrees`` clockwise (a multiple
+    of 90) without re-encoding. Uses -perfect, so images whose size is not a
+    whole number of MCUs are refused (False) rather than trimmed.
+    """
+    degrees %= 360
+    if degrees % 90 or not path.lower().endswith(JPEG_EXTS) or find_jpegtran() is None:
+        return False
+    if degrees == 0:
+        return True
+    if jpeg_layout(path) is None:
+        return False
+    return _run_jpegtran(["-copy", "none", "-perfect", "-rotate", str(degrees)], path, path)
@@ -1,41 +1,126 @@
 import os
 import sys
-import tkinter as tk
-from tkinter import messagebox
-from ultralytics import YOLO
-import torch
+import threading
+from types import SimpleNamespace
 
 MODEL_FILENAME = "yolo11x.pt"  # put this in the package root (next to app.py)
 
+# Load state, readable from any thread (e.g. polled by the GUI):
+#   status: "idle" -> "loading" [-> "warming"] -> "ready" | "failed"
+#   error:  message of the last failed load, else ""
+#   device: "cuda" or "cpu" once loaded, "" while unknown (or a stand-in model)
+model_state = SimpleNamespace(status="idle", error="", device="")
+
+# Default worker processes on a CPU-only machine: one per this many cores,
+# at most MAX_DEFAULT_JOBS (each process holds its own copy of the model)
+CPU_THREADS_PER_JOB = 4
+MAX_DEFAULT_JOBS = 4
+
 _model_singleton = None
+_model_lock = threading.Lock()
 
-def get_model():
-    """Load YOLO once (GPU if available), reuse thereafter."""
+def get_model(show_errors=True, mark_ready=True):
+    """
+    Load YOLO once (GPU if available), reuse thereafter. The background
+    warm-up passes mark_ready=False and sets "ready" itself once done.
+    """
     global _model_singleton
     if _model_singleton is not None:
         return _model_singleton
 
-    # Figure out where we are (normal script vs PyInstaller bundle)
-    if getattr(sys, "frozen", False):
-        # Running from PyInstaller bundle
-        base_dir = sys._MEIPASS
-    else:
-        base_dir = os.path.dirname(os.path.abspath(__file__))
-    model_path = os.path.join(base_dir, MODEL_FILENAME)
+    with _model_lock:
+        # Another thread may have finished loading while we waited
+        if _model_singleton is not None:
+            return _model_singleton
+        model_state.status = "loading"
 
-    # Try loading the model (on GPU hopefully)
-    try:
-        model = YOLO(model_path)
-        if torch.cuda.is_available():
-            model.to("cuda:0")
+        # Figure out where we are (normal script vs PyInstaller bundle)
+        if getattr(sys, "frozen", False):
+            # Running from PyInstaller bundle
+            base_dir = sys._MEIPASS
         else:
-            model.to("cpu")
+            base_dir = os.path.dirname(os.path.abspath(__file__))
+        model_path = os.path.join(base_dir, MODEL_FILENAME)
+
+        # Try loading the model (on GPU hopefully). ultralytics/torch are
+        # imported here rather than at module level to keep app start-up fast.
+        try:
+            from ultralytics import YOLO
+            import torch
+
+            model = YOLO(model_path)
+            if torch.cuda.is_available():
+                model.to("cuda:0")
+                model_state.device = "cuda"
+            else:
+                model.to("cpu")
+                model_state.device = "cpu"
+            _model_singleton = model
+            if mark_ready:
+                model_state.status = "ready"
+            model_state.error = ""
+            return _model_singleton
+        except Exception as e:
+            model_state.status = "failed"
+            model_state.error = str(e)
+            if show_errors:
+                # Safe to show a dialog because app has Tk root. Imported here
+                # so headless use (CLI, child processes) never needs Tk.
+                try:
+                    import tkinter as tk
+                    from tkinter import messagebox
+                except ImportError:
+                    pass
+                else:
+                    try:
+                        messagebox.showerror("Model load failed", f"Failed to load model:\n{e}")
+                    except tk.TclError:
+                        pass
+            raise
+
+def default_jobs():
+    """
+    Worker processes to crop with when the user hasn't chosen: 1 on a GPU
+    (or before the model has loaded), a share of the cores on CPU.
+    """
+    if model_state.device != "cpu":
+        return 1
+    return max(1, min(MAX_DEFAULT_JOBS, (os.cpu_count() or 1) // CPU_THREADS_PER_JOB))
+
+def set_model(model):
+    """
+    Install ``model`` as the singleton returned by get_model(). Anything with
+    a YOLO-compatible predict() works, e.g. a stand-in detector for benchmarks.
+    """
+    global _model_singleton
+    with _model_lock:
         _model_singleton = model
-        return _model_singleton
+        model_state.status = "ready"
+        model_state.error = ""
+
+def _warm_up():
+    # Deferred import: cropper imports this module
+    import numpy as np
+    from autocropper.cropper import predict_images, COARSE_IMGSZ
+
+    try:
+        # Status stays "loading" -> "warming" until the dummy inference is
+        # done, so the GUI doesn't enable Run in between
+        model = get_model(show_errors=False, mark_ready=False)
     except Exception as e:
-        # Safe to show a dialog because app has Tk root
-        try:
-            messagebox.showerror("Model load failed", f"Failed to load model:\n{e}")
-        except tk.TclError:
-            pass
-        raise
\ No newline at end of file
+        print(f"[model] warm-up load failed: {e}")
+        return
+    # One dummy inference so the first real image doesn't pay for
+    # lazy initialisation (CUDA context, kernel selection, fusing)
+    model_state.status = "warming"
+    try:
+        predict_images(model, [np.zeros((64, 64, 3), dtype=np.uint8)], imgsz=COARSE_IMGSZ)
+    finally:
+        model_state.status = "ready"
+
+def start_warm_up():
+    """Load and warm the model on a background thread (no-op once started)."""
+    if model_state.status != "idle":
+        return
+    model_state.status = "loading"
+    threading.Thread(target=_warm_up, name="model-warm-up", daemon=True).start()
@@ -0,0 +1,332 @@
+"""
+Tk-free cropping engine shared by the GUI worker (worker.run_cropper) and the
+headless CLI (python -m autocropper crop).
+
+crop_folder() picks the mode: crop_pipeline() overlaps decode, batched
+inference and encode inside this process; crop_with_processes() hands
+lot-grouped shards to child processes that each load their own model.
+Both report through runtime.progress and stop on runtime.stop_event.
+Stage timings (decode, inference, postprocess, encode) and queue depths are
+recorded on runtime.progress as well and saved to METRICS_FILENAME in the
+output folder when a run ends.
+"""
+import os, signal, sys, threading, time, queue
+import multiprocessing
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from autocropper.runtime import progress, stop_event, RunMetrics, METRICS_FILENAME
+from autocropper.cropper import (
+    BATCH_SIZE, decode_for_detection, compute_crop_boxes, save_crop,
+    cache_for_folder, detection_key, detect_boxes_cached,
+)
+from autocropper.io_utils import FolderIndex, parse_image_name, group_images_by_lot, _folder_path
+
+# Pipeline sizing: threads per stage and how many images each stage may hold.
+# Decoded images waiting for inference are bounded by DECODE_QUEUE_DEPTH and
+# crops waiting to be encoded by WRITE_QUEUE_DEPTH, so memory stays flat
+# regardless of how many images the sale has.
+DECODE_WORKERS = 2
+WRITE_WORKERS = 2
+DECODE_QUEUE_DEPTH = 8
+WRITE_QUEUE_DEPTH = 8
+
+# How often the parent polls child processes in process-pool mode (seconds)
+PROCESS_POLL_INTERVAL = 0.2
+
+def list_image_files(input_dir, skip_lots=None):
+    """
+    Basenames of the images in input_dir (a path, or a FolderIndex whose
+    listing is reused) to crop. With skip_lots, only files whose name parses
+    to a lot outside skip_lots are kept.
+    """
+    names = sorted(input_dir.names) if isinstance(input_dir, FolderIndex) else os.listdir(input_dir)
+    all_files = [
+        f for f in names
+        if f.lower().endswith((".jpg", ".jpeg", ".png"))
+    ]
+    if not skip_lots:
+        return all_files
+
+    filtered = []
+    for fname in all_files:
+        parsed = parse_image_name(fname)
+        if not parsed:
+            continue
+        lot, idx, scheme, ext = parsed
+        if lot not in skip_lots:
+            filtered.append(fname)
+    return filtered
+
+def crop_pipeline(pairs, on_image_done, batch_size=BATCH_SIZE,
+                  decode_depth=DECODE_QUEUE_DEPTH, write_depth=WRITE_QUEUE_DEPTH, stop=None,
+                  cache=None, metrics=None):
+    """
+    Crop (src, dst) pairs with decode, inference and encode overlapped:
+      - a prefetch pool decodes upcoming images (at most decode_depth ahead)
+      - the calling thread batches decoded images through the model
+      - a writer pool encodes and saves crops (at most write_depth pending)
+    on_image_done(src) is called once per pair after its output is written
+    (or after it failed to load), possibly from a writer thread.
+    Stops taking new work as soon as stop (default: runtime.stop_event) is
+    set; crops already handed to the writer pool are still finished.
+    With a DetectionCache, the decode stage also hashes each source so
+    cached detections skip the model entirely.
+    Queued images are reduced JPEG decodes (cropper.decode_for_detection);
+    the full-resolution image is decoded by the writer, one per write.
+    Stage times and queue depths go to metrics (default: runtime.progress).
+    """
+    stop = stop_event if stop is None else stop
+    metrics = progress if metrics is None else metrics
+    batch_size = max(1, int(batch_size))
+    decode_depth = max(batch_size, int(decode_depth))
+    write_slots = threading.BoundedSemaphore(max(1, int(write_depth)))
+    todo = iter(pairs)
+    pending = deque()   # (src, dst, future) in input order
+
+    decode_pool = ThreadPoolExecutor(DECODE_WORKERS, thread_name_prefix="crop-decode")
+    write_pool = ThreadPoolExecutor(WRITE_WORKERS, thread_name_prefix="crop-write")
+
+    def decode_job(src):
+        with metrics.stage("decode"):
+            image, full_shape = decode_for_detection(src)
+            return image, full_shape, detection_key(cache, src)
+
+    def refill():
+        while len(pending) < decode_depth and not stop.is_set():
+            try:
+                src, dst = next(todo)
+            except StopIteration:
+                return
+            pending.append((src, dst, decode_pool.submit(decode_job, src)))
+        metrics.set_queue("decode", len(pending))
+
+    def write_job(image, full_shape, box, src, dst):
+        try:
+            with metrics.stage("encode"):
+                save_crop(image, full_shape, box, src, dst)
+        except Exception as e:
+            print(f"Failed to write {dst}: {e}")
+        finally:
+            write_slots.release()
+            metrics.adjust_queue("write", -1)
+            on_image_done(src)
+
+    try:
+        refill()
+        while pending and not stop.is_set():
+            # Collect the next batch of decoded images (in input order)
+            batch = []
+            while pending and len(batch) < batch_size:
+                src, dst, fut = pending.popleft()
+                image, full_shape, key = fut.result()
+                if image is None:
+                    on_image_done(src)
+                    continue
+                batch.append((src, dst, image, full_shape, key))
+            refill()
+            if not batch:
+                continue
+
+            metrics.current_file = batch[0][0]
+            metrics.set_queue("decode", len(pending))
+            sources = [src for src, _dst, _image, _shape, _key in batch]
+            images = [image for _src, _dst, image, _shape, _key in batch]
+            shapes = [shape for _src, _dst, _image, shape, _key in batch]
+            # Includes detection-cache lookups; cache hits skip the model
+            with metrics.stage("inference", items=len(batch)):
+                detections = detect_boxes_cached(
+                    images,
+                    [key for _src, _dst, _image, _shape, key in batch],
+                    cache,
+                    full_shapes=shapes,
+                    sources=sources,
+                )
+
+            with metrics.stage("postprocess", items=len(batch)):
+                crops = compute_crop_boxes(images, detections, sources, shapes=shapes)
+
+            # Hand crops to the writer pool; blocks while write_depth are queued.
+            # images holds the full-size decode of escalated images, if any
+            for (src, dst, _image, full_shape, _key), image, box in zip(batch, images, crops):
+                write_slots.acquire()
+                metrics.adjust_queue("write", 1)
+                write_pool.submit(write_job, image, full_shape, box, src, dst)
+    finally:
+        for _src, _dst, fut in pending:
+            fut.cancel()
+        decode_pool.shutdown(wait=True, cancel_futures=True)
+        write_pool.shutdown(wait=True)
+
+def shard_by_lot(input_dir, image_files, jobs):
+    """
+    Split image_files (basenames in input_dir, a path or a FolderIndex) into
+    at most ``jobs`` lists of basenames, keeping every lot inside a single shard.
+    Lots come from group_images_by_lot; files whose names don't parse form
+    their own unit. Largest lots are placed first on the lightest shard so
+    shards end up with similar image counts.
+    """
+    wanted = set(image_files)
+    units = []
+    seen = set()
+    for _lot, paths in group_images_by_lot(input_dir).items():
+        names = [os.path.basename(p) for p in paths if os.path.basename(p) in wanted]
+        if names:
+            units.append(names)
+            seen.update(names)
+    units.extend([f] for f in image_files if f not in seen)
+
+    shards = [[] for _ in range(max(1, min(int(jobs), len(units))))]
+    for names in sorted(units, key=len, reverse=True):
+        min(shards, key=len).extend(names)
+    return [s for s in shards if s]
+
+def _crop_shard(pairs, batch_size, decode_depth, write_depth, threads, counter, stop,
+                results, log_to_stderr=False):
+    """
+    Process-pool entry point: crop one shard with this process's own model.
+    Stage timings are put on the results queue for the parent to merge.
+    """
+    # Ctrl-C in a terminal reaches the whole process group; children stop
+    # only through ``stop`` (set by the parent) so in-flight crops are written
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+
+    # Keep stdout clean for a parent that emits machine-readable output there
+    if log_to_stderr:
+        sys.stdout = sys.stderr
+
+    # Split the cores between processes instead of every child using all of them
+    try:
+        import torch
+        torch.set_num_threads(threads)
+    except Exception:
+        pass
+
+    def image_done(_src):
+        with counter.get_lock():
+            counter.value += 1
+
+    metrics = RunMetrics()
+    metrics.reset(len(pairs))
+    cache = cache_for_folder(os.path.dirname(pairs[0][1])) if pairs else None
+    try:
+        crop_pipeline(
+            pairs, image_done,
+            batch_size=batch_size,
+            decode_depth=decode_depth,
+            write_depth=write_depth,
+            stop=stop,
+            cache=cache,
+            metrics=metrics,
+        )
+    finally:
+        results.put(metrics.export_stages())
+    if cache is not None:
+        print(f"[cache] {cache.stats()}")
+
+def crop_with_processes(shards, jobs, batch_size=BATCH_SIZE,
+                        decode_depth=DECODE_QUEUE_DEPTH, write_depth=WRITE_QUEUE_DEPTH,
+                        log_to_stderr=False):
+    """
+    Crop lists of (src, dst) pairs in separate processes, one shard per
+    process, each loading its own model via get_model(). Blocks until all
+    children exit while mirroring their combined count into
+    progress.current and forwarding stop_event to them. Each child's stage
+    timings are merged into progress once it finishes.
+    """
+    ctx = multiprocessing.get_context("spawn")
+    counter = ctx.Value("i", 0)
+    child_stop = ctx.Event()
+    results = ctx.Queue()
+    threads = max(1, (os.cpu_count() or 1) // max(1, jobs))
+
+    procs = [
+        ctx.Process(
+            target=_crop_shard,
+            args=(pairs, batch_size, decode_depth, write_depth, threads, counter, child_stop,
+                  results, log_to_stderr),
+            daemon=True,
+        )
+        for pairs in shards
+    ]
+    for p in procs:
+        p.start()
+
+    def sync_count():
+        done = counter.value - progress.current
+        if done > 0:
+            progress.image_done(done)
+
+    def drain_results():
+        # Drained while children run too: a child can't exit until the
+        # parent has read what it put on the queue
+        while True:
+            try:
+                progress.merge_stages(results.get_nowait())
+            except queue.Empty:
+                return
+
+    while any(p.is_alive() for p in procs):
+        if stop_event.is_set():
+            child_stop.set()
+        sync_count()
+        drain_results()
+        time.sleep(PROCESS_POLL_INTERVAL)
+    for p in procs:
+        p.join()
+    sync_count()
+    drain_results()
+
+def crop_folder(input_dir, output_dir, image_files, batch_size=BATCH_SIZE,
+                decode_depth=DECODE_QUEUE_DEPTH, write_depth=WRITE_QUEUE_DEPTH, jobs=1,
+                log_to_stderr=False):
+    """
+    Crop image_files (basenames in input_dir) into output_dir, blocking until
+    done or stopped. input_dir may be a FolderIndex of the input folder, so
+    process-pool sharding reuses its listing. Resets runtime.progress for the run, clears
+    progress.running at the end and writes the run's metrics to
+    METRICS_FILENAME in output_dir. jobs > 1 selects the process-pool mode.
+    """
+    in_dir = _folder_path(input_dir)
+    progress.reset(len(image_files))
+    progress.info.update(jobs=jobs, batch_size=batch_size,
+                         decode_depth=decode_depth, write_depth=write_depth)
+
+    try:
+        if jobs > 1:
+            # Process-pool mode: lot-grouped shards, one model per process
+            shards = [
+                [(os.path.join(in_dir, f), os.path.join(output_dir, f)) for f in shard]
+                for shard in shard_by_lot(input_dir, image_files, jobs)
+            ]
+            crop_with_processes(
+                shards, jobs,
+                batch_size=batch_size,
+                decode_depth=decode_depth,
+                write_depth=write_depth,
+                log_to_stderr=log_to_stderr,
+            )
+            return
+
+        pairs = [
+            (os.path.join(in_dir, f), os.path.join(output_dir, f))
+            for f in image_files
+        ]
+        def image_done(_src):
+            # Called from writer threads; image_done() is atomic
+            progress.image_done()
+
+        cache = cache_for_folder(output_dir)
+        crop_pipeline(
+            pairs, image_done,
+            batch_size=batch_size,
+            decode_depth=decode_depth,
+            write_depth=write_depth,
+            cache=cache,
+        )
+        if cache is not None:
+            progress.info["cache"] = cache.stats()
+            print(f"[cache] {cache.stats()}")
+    finally:
+        progress.finish()
+        progress.info["cancelled"] = stop_event.is_set()
+        progress.write_json(os.path.join(output_dir, METRICS_FILENAME))
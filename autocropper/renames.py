@@ -0,0 +1,169 @@
+"""
+Crash-safe batch renames inside a folder.
+
+A rename plan {src_abs: dst_abs} may contain chains and cycles (renumbering
+"6 (1)" -> "6 (2)" -> "6 (3)"), so it is applied in two phases: every source
+is first moved to a unique temporary name (stem.__tmp__k.ext), then every
+temporary name is moved to its destination. Temporary names don't parse as
+lot images, so a process that dies between the phases would leave those
+photos out of their lots.
+
+Before touching any file, the whole plan is written to a journal
+(JOURNAL_FILENAME in the folder) and fsynced; a second record marks the end
+of phase 1. recover_renames() finishes or undoes an interrupted batch:
+  - phase 1 not finished: roll back (temporary names return to their
+    sources; nothing was at its destination yet)
+  - phase 1 finished: replay phase 2 (temporary names go to destinations)
+It runs before every batch in the same folder and should be called when a
+folder is opened. The journal is removed once a batch is complete.
+"""
+import json
+import os
+
+JOURNAL_FILENAME = ".autocrop_renames.journal"
+_TMP_MARK = ".__tmp__"
+
+def _journal_path(folder):
+    return os.path.join(folder, JOURNAL_FILENAME)
+
+def _write_journal(folder, entries):
+    # Written aside and moved into place: a journal is either complete or absent
+    path = _journal_path(folder)
+    tmp = path + ".tmp"
+    with open(tmp, "w", encoding="utf-8") as fh:
+        fh.write(json.dumps({"op": "plan", "entries": entries}) + "\n")
+        fh.flush()
+        os.fsync(fh.fileno())
+    os.replace(tmp, path)
+
+def _mark_moved(folder):
+    with open(_journal_path(folder), "a", encoding="utf-8") as fh:
+        fh.write(json.dumps({"op": "moved"}) + "\n")
+        fh.flush()
+        os.fsync(fh.fileno())
+
+def _read_journal(folder):
+    # (entries, phase 1 finished) or None; a torn "moved" record counts as absent
+    try:
+        with open(_journal_path(folder), "r", encoding="utf-8") as fh:
+            lines = fh.read().splitlines()
+        entries = json.loads(lines[0])["entries"]
+    except (OSError, ValueError, IndexError, KeyError) as e:
+        if os.path.exists(_journal_path(folder)):
+            print(f"[renames] unreadable journal in {folder}: {e}")
+        return None
+    moved = False
+    for line in lines[1:]:
+        try:
+            moved = moved or json.loads(line).get("op") == "moved"
+        except ValueError:
+            pass
+    return entries, moved
+
+def _finish(folder, entries, moved):
+    # Replay phase 2 (moved) or roll phase 1 back; returns files that failed
+    failed = 0
+    for src, tmp, dst in entries:
+        tmp_path = os.path.join(folder, tmp)
+        if not os.path.exists(tmp_path):
+            continue
+        target = os.path.join(folder, dst if moved else src)
+        try:
+            os.replace(tmp_path, target)
+        except OSError as e:
+            print(f"[renames] could not restore {tmp} -> {os.path.basename(target)}: {e}")
+            failed += 1
+    return failed
+
+def recover_renames(folder):
+    """
+    Finish or undo a batch interrupted in ``folder``. Returns the number of
+    planned renames it covered (0 when there was nothing to recover).
+    """
+    # A journal that was still being written: no file was touched yet
+    try:
+        os.remove(_journal_path(folder) + ".tmp")
+    except OSError:
+        pass
+    journal = _read_journal(folder)
+    if journal is None:
+        return 0
+    entries, moved = journal
+    failed = _finish(folder, entries, moved)
+    if failed:
+        # Keep the journal so the next attempt can finish the job
+        return len(entries)
+    try:
+        os.remove(_journal_path(folder))
+    except OSError:
+        pass
+    action = "completed" if moved else "rolled back"
+    print(f"[renames] {folder}: {action} an interrupted batch of {len(entries)} renames")
+    return len(entries)
+
+def apply_renames(plan, names=None):
+    """
+    Apply {src_abs: dst_abs} (any number of lots, one journal per folder).
+    ``names`` is the set of entry names already in the folder, when the
+    caller has it (e.g. FolderIndex.names); otherwise the folder is listed
+    once. Sources that no longer exist are skipped. Returns the renames
+    that were applied, {src_abs: dst_abs}.
+    """
+    by_folder = {}
+    for src, dst in plan.items():
+        if src != dst:
+            by_folder.setdefault(os.path.dirname(src), []).append((src, dst))
+    applied = {}
+    for folder, pairs in by_folder.items():
+        applied.update(_apply_in_folder(folder, pairs, names))
+    return applied
+
+def _apply_in_folder(folder, pairs, names):
+    if recover_renames(folder) or names is None:
+        try:
+            names = set(os.listdir(folder))
+        except FileNotFoundError:
+            return {}
+    used = set(names)
+    used.update(os.path.basename(dst) for _src, dst in pairs)
+
+    def temp_for(dst_name):
+        stem, ext = os.path.splitext(dst_name)
+        k = 0
+        while True:
+            tmp = f"{stem}{_TMP_MARK}{k}{ext}"
+            if tmp not in used:
+                used.add(tmp)
+                return tmp
+            k += 1
+
+    entries = [
+        [os.path.basename(src), temp_for(os.path.basename(dst)), os.path.basename(dst)]
+        for src, dst in pairs
+    ]
+    _write_journal(folder, entries)
+
+    # Phase 1: sources -> temporary names; any failure undoes the batch
+    moved = []
+    try:
+        for entry, (src, _dst) in zip(entries, pairs):
+            try:
+                os.replace(src, os.path.join(folder, entry[1]))
+            except FileNotFoundError:
+                continue
+            moved.append(entry)
+        _mark_moved(folder)
+    except BaseException:
+        _finish(folder, entries, moved=False)
+        try:
+            os.remove(_journal_path(folder))
+        except OSError:
+            pass
+        raise
+
+    # Phase 2: temporary names -> destinations. On failure the journal stays
+    # and recover_renames() finishes the batch later
+    for src, tmp, dst in moved:
+        os.replace(os.path.join(folder, tmp), os.path.join(folder, dst))
+    os.remove(_journal_path(folder))
+    return {os.path.join(folder, src): os.path.join(folder, dst) for src, _tmp, dst in moved}
@@ -0,0 +1,202 @@
+"""
+Which output files have been reviewed, stored next to the crops.
+
+The set of reviewed basenames is loaded once per process and kept in memory,
+so marking a lot or checking resume state never re-reads a file. Each entry
+is also stored in a single SQLite file with its lot and the time it was
+marked. New entries are committed in batches: at most COMMIT_INTERVAL seconds
+after the first uncommitted one (a timer commits a batch nobody adds to), and
+always on flush() (the review window flushes when it closes; an atexit hook
+covers the rest). Entries the database refuses are appended to reviewed.txt.
+
+Older output folders have a plain reviewed.txt (one basename per line). Its
+entries are imported when the store is opened, so those folders keep
+resuming where they left off. When the database can't be opened (e.g. a
+read-only share), the store falls back to appending to reviewed.txt. On a
+network share the database uses SQLite's rollback journal rather than WAL,
+which needs shared memory the share can't provide (see fsinfo).
+"""
+import atexit
+import os
+import sqlite3
+import threading
+import time
+
+from autocropper.fsinfo import sqlite_journal_mode
+
+STORE_FILENAME = ".autocrop_reviewed.sqlite3"
+LEGACY_FILENAME = "reviewed.txt"
+COMMIT_INTERVAL = 2.0   # seconds an uncommitted mark may wait
+
+_stores = {}
+_stores_lock = threading.Lock()
+
+def get_reviewed_store(folder):
+    """Open (once per process) the reviewed-state store of an output folder."""
+    folder = os.path.abspath(folder)
+    with _stores_lock:
+        store = _stores.get(folder)
+        if store is None:
+            store = ReviewedStore(folder)
+            _stores[folder] = store
+        return store
+
+@atexit.register
+def flush_all():
+    with _stores_lock:
+        stores = list(_stores.values())
+    for store in stores:
+        store.flush()
+
+class ReviewedStore:
+    def __init__(self, folder):
+        self.folder = folder
+        self.legacy_path = os.path.join(folder, LEGACY_FILENAME)
+        self.names = set()      # reviewed basenames (read-only for callers)
+        self._lock = threading.Lock()
+        self._pending = 0
+        self._last_commit = time.monotonic()
+        self._timer = None      # commits a batch COMMIT_INTERVAL after it started
+        self._db = None
+        try:
+            self._db = sqlite3.connect(
+                os.path.join(folder, STORE_FILENAME), timeout=30, check_same_thread=False
+            )
+            mode = sqlite_journal_mode(folder)
+            self._db.execute(f"PRAGMA journal_mode={mode}")
+            # NORMAL is durable enough with WAL; the rollback journal needs FULL
+            self._db.execute("PRAGMA synchronous=" + ("NORMAL" if mode == "WAL" else "FULL"))
+            self._db.execute(
+                "CREATE TABLE IF NOT EXISTS reviewed ("
+                " name TEXT PRIMARY KEY,"
+                " lot TEXT,"
+                " reviewed_at REAL NOT NULL)"
+            )
+            self._db.commit()
+            self.names.update(name for (name,) in self._db.execute("SELECT name FROM reviewed"))
+        except sqlite3.Error as e:
+            print(f"[reviewed] {folder}: no database ({e}); using {LEGACY_FILENAME}")
+            self._db = None
+        self._import_legacy()
+
+    def _import_legacy(self):
+        try:
+            with open(self.legacy_path, "r", encoding="utf-8") as fh:
+                legacy = {os.path.basename(ln.strip()) for ln in fh if ln.strip()}
+        except FileNotFoundError:
+            return
+        except OSError as e:
+            print(f"[reviewed] could not read {self.legacy_path}: {e}")
+            return
+        new = legacy - self.names
+        if not new:
+            return
+        if self._db is None:
+            self.names.update(new)
+            return
+        # Imported entries keep no lot; their time is the legacy file's mtime
+        try:
+            mtime = os.path.getmtime(self.legacy_path)
+        except OSError:
+            mtime = time.time()
+        with self._lock:
+            self._db.executemany(
+                "INSERT OR IGNORE INTO reviewed (name, lot, reviewed_at) VALUES (?, NULL, ?)",
+                [(name, mtime) for name in new],
+            )
+            self._db.commit()
+            self.names.update(new)
+        print(f"[reviewed] imported {len(new)} entries from {LEGACY_FILENAME}")
+
+    def __contains__(self, name):
+        return os.path.basename(name) in self.names
+
+    def add(self, names, lot=None):
+        """Mark basenames (iterable) reviewed; returns the ones that were new."""
+        with self._lock:
+            new = []
+            for name in names:
+                name = os.path.basename(name)
+                if name not in self.names:
+                    self.names.add(name)
+                    new.append(name)
+            if not new:
+                return new
+            if self._db is None:
+                self._append_legacy(new)
+                return new
+            now = time.time()
+            try:
+                self._db.executemany(
+                    "INSERT OR REPLACE INTO reviewed (name, lot, reviewed_at) VALUES (?, ?, ?)",
+                    [(name, lot, now) for name in new],
+                )
+            except sqlite3.Error as e:
+                # e.g. locked by another station: keep the marks in reviewed.txt,
+                # which is imported the next time the store is opened
+                print(f"[reviewed] could not store {len(new)} entries ({e}); using {LEGACY_FILENAME}")
+                self._append_legacy(new)
+                return new
+            if not self._pending:
+                self._last_commit = time.monotonic()
+            self._pending += len(new)
+            if time.monotonic() - self._last_commit >= COMMIT_INTERVAL:
+                self._commit_locked()
+            else:
+                self._schedule_commit_locked()
+            return new
+
+    def _append_legacy(self, names):
+        try:
+            with open(self.legacy_path, "a", encoding="utf-8") as fh:
+                for name in names:
+                    fh.write(name + "\n")
+        except OSError as e:
+            print(f"[reviewed] could not write {self.legacy_path}: {e}")
+
+    def _schedule_commit_locked(self):
+        # An idle reviewer must not leave the last marks uncommitted (and
+        # the shared database write-locked) until the next add()
+        if self._timer is not None:
+            return
+        self._timer = threading.Timer(COMMIT_INTERVAL, self._commit_due)
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _commit_due(self):
+        with self._lock:
+            self._timer = None
+            if self._db is not None and self._pending:
+                self._commit_locked()
+
+    def _commit_locked(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        try:
+            self._db.commit()
+        except sqlite3.Error as e:
+            print(f"[reviewed] commit failed: {e}")
+            self._schedule_commit_locked()     # retry later
+            return
+        self._pending = 0
+        self._last_commit = time.monotonic()
+
+    def flush(self):
+        """Commit marks still waiting for their batch."""
+        with self._lock:
+            if self._db is not None and self._pending:
+                self._commit_locked()
+
+    def close(self):
+        self.flush()
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._db is not None:
+                try:
+                    self._db.close()
+                except sqlite3.Error:
+                    pass
+                self._db = None
@@ -1,15 +1,169 @@
 # Shared runtime/state to avoid circular imports
-from types import SimpleNamespace
+import json
 import threading
+import time
+from collections import deque
+from contextlib import contextmanager
 import cv2
 
-# Progress struct used by worker + progress window
-progress = SimpleNamespace(
-    current=0,
-    total=0,
-    current_file="",
-    running=False,
-)
+# Written into the output folder at the end of every cropping run
+METRICS_FILENAME = "crop_metrics.json"
+
+class RunMetrics:
+    """
+    Progress and per-stage timing for one cropping run, shared by the
+    cropping engine, the progress window and the CLI. Safe to update from
+    any thread.
+
+    current/total/current_file/running keep their old meaning. On top of
+    that each stage (decode, inference, postprocess, encode) records
+    calls, items and seconds, queue depths are tracked as gauges, and rates
+    are computed over the last RATE_WINDOW seconds.
+    """
+    SAMPLES = 2000          # per-stage call durations kept for percentiles
+    RATE_WINDOW = 30.0      # seconds
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset(0)
+        self.running = False
+
+    def reset(self, total):
+        """Start a new run of ``total`` images."""
+        with self._lock:
+            self.current = 0
+            self.total = total
+            self.current_file = ""
+            self.running = True
+            self.started = time.perf_counter()
+            self.finished = None
+            self.queues = {}
+            self.info = {}
+            self._stages = {}
+            self._done = deque(maxlen=10000)
+
+    def finish(self):
+        with self._lock:
+            self.running = False
+            self.finished = time.perf_counter()
+
+    def elapsed(self):
+        end = self.finished if self.finished is not None else time.perf_counter()
+        return max(0.0, end - self.started)
+
+    # --- counters -----------------------------------------------------------
+
+    def image_done(self, n=1):
+        """Count n images as finished (written, or failed to load)."""
+        now = time.perf_counter()
+        with self._lock:
+            self.current += n
+            self._done.extend([now] * n)
+
+    def add_time(self, stage, seconds, items=1):
+        """Record one call of ``stage`` that handled ``items`` images."""
+        now = time.perf_counter()
+        with self._lock:
+            st = self._stages.get(stage)
+            if st is None:
+                st = self._stages[stage] = {"calls": 0, "items": 0, "seconds": 0.0,
+                                            "samples": deque(maxlen=self.SAMPLES)}
+            st["calls"] += 1
+            st["items"] += items
+            st["seconds"] += seconds
+            st["samples"].append((now, seconds, items))
+
+    @contextmanager
+    def stage(self, stage, items=1):
+        """Time the body of a with-block as one call of ``stage``."""
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.add_time(stage, time.perf_counter() - t0, items)
+
+    def set_queue(self, name, depth):
+        self.queues[name] = depth
+
+    def adjust_queue(self, name, delta):
+        with self._lock:
+            self.queues[name] = self.queues.get(name, 0) + delta
+
+    # --- reporting ----------------------------------------------------------
+
+    def rate(self):
+        """Images finished per second over the last RATE_WINDOW seconds."""
+        now = time.perf_counter()
+        with self._lock:
+            recent = sum(1 for t in self._done if now - t <= self.RATE_WINDOW)
+        window = min(self.RATE_WINDOW, now - self.started)
+        return recent / window if window > 0 else 0.0
+
+    def export_stages(self):
+        """Raw per-stage records, for merging into another RunMetrics."""
+        with self._lock:
+            return {name: dict(st, samples=list(st["samples"])) for name, st in self._stages.items()}
+
+    def merge_stages(self, stages):
+        """Fold export_stages() output (e.g. from a child process) into this run."""
+        with self._lock:
+            for name, other in stages.items():
+                st = self._stages.setdefault(name, {"calls": 0, "items": 0, "seconds": 0.0,
+                                                    "samples": deque(maxlen=self.SAMPLES)})
+                st["calls"] += other["calls"]
+                st["items"] += other["items"]
+                st["seconds"] += other["seconds"]
+                st["samples"].extend(other["samples"])
+
+    def snapshot(self):
+        """Plain-dict summary of the run so far (what write_json saves)."""
+        now = time.perf_counter()
+        window = max(1e-6, min(self.RATE_WINDOW, now - self.started))
+        stages = {}
+        with self._lock:
+            for name, st in self._stages.items():
+                durations = sorted(s for _t, s, _n in st["samples"])
+                recent = sum(n for t, _s, n in st["samples"] if now - t <= self.RATE_WINDOW)
+
+                def pct(q):
+                    if not durations:
+                        return 0.0
+                    return durations[min(len(durations) - 1, int(q * len(durations)))] * 1000
+
+                stages[name] = {
+                    "calls": st["calls"],
+                    "items": st["items"],
+                    "seconds": round(st["seconds"], 4),
+                    "ms_per_item": round(1000 * st["seconds"] / st["items"], 2) if st["items"] else 0.0,
+                    "p50_ms": round(pct(0.50), 2),
+                    "p95_ms": round(pct(0.95), 2),
+                    "recent_items_per_sec": round(recent / window, 3),
+                }
+            queues = dict(self.queues)
+            info = dict(self.info)
+        elapsed = self.elapsed()
+        return {
+            "done": self.current,
+            "total": self.total,
+            "running": self.running,
+            "elapsed_s": round(elapsed, 3),
+            "images_per_sec": round(self.current / elapsed, 3) if elapsed else 0.0,
+            "recent_images_per_sec": round(self.rate(), 3),
+            "queues": queues,
+            "stages": stages,
+            **info,
+        }
+
+    def write_json(self, path):
+        """Save snapshot() to ``path``; failures are logged, not raised."""
+        try:
+            with open(path, "w", encoding="utf-8") as f:
+                json.dump(self.snapshot(), f, indent=2)
+        except OSError as e:
+            print(f"[metrics] could not write {path}: {e}")
+
+# Progress/metrics object used by the cropping engine, worker and progress window
+progress = RunMetrics()
 
 # Global stop event (set on cancel/close)
 stop_event = threading.Event()
@@ -0,0 +1,203 @@
+"""
+Folder watcher: keeps a FolderIndex of the input or output folder current
+while the GUI is open, so the review and export windows read lot -> files
+from memory instead of listing the folder again.
+
+On Linux the folder is watched with inotify (through ctypes, no extra
+dependency). Elsewhere, or when inotify can't be set up, the folder is
+re-listed every POLL_INTERVAL seconds on a background thread and only the
+entries that changed are re-read. Either way a change is picked up by
+re-statting the affected names, so the index always reflects what is on
+disk now, whatever order the events arrive in.
+
+FolderWatcher is a read-only mapping {lot: [sorted paths]}, a drop-in for the
+dicts returned by group_images_by_lot. Code that changes files itself calls
+refresh(*paths) so its own renames are visible immediately rather than on
+the next event or poll.
+"""
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import sys
+import threading
+from collections.abc import Mapping
+
+from autocropper.io_utils import FolderIndex
+
+POLL_INTERVAL = 2.0     # seconds between listings in polling mode
+
+# inotify(7) event bits
+_IN_ATTRIB      = 0x00000004
+_IN_CLOSE_WRITE = 0x00000008
+_IN_MOVED_FROM  = 0x00000040
+_IN_MOVED_TO    = 0x00000080
+_IN_CREATE      = 0x00000100
+_IN_DELETE      = 0x00000200
+_IN_DELETE_SELF = 0x00000400
+_IN_MOVE_SELF   = 0x00000800
+_IN_Q_OVERFLOW  = 0x00004000
+_IN_IGNORED     = 0x00008000
+_IN_MASK = (_IN_ATTRIB | _IN_CLOSE_WRITE | _IN_MOVED_FROM | _IN_MOVED_TO
+            | _IN_CREATE | _IN_DELETE | _IN_DELETE_SELF | _IN_MOVE_SELF)
+_IN_RESCAN = _IN_Q_OVERFLOW | _IN_DELETE_SELF | _IN_MOVE_SELF | _IN_IGNORED
+_EVENT = struct.Struct("iIII")      # wd, mask, cookie, len (+ name[len])
+
+def _inotify_open(folder):
+    """A non-blocking inotify fd watching ``folder``, or None if unavailable."""
+    if not sys.platform.startswith("linux"):
+        return None
+    try:
+        libc = ctypes.CDLL(ctypes.util.find_library("c") or "libc.so.6", use_errno=True)
+        fd = libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+    except (OSError, AttributeError):
+        return None
+    if fd < 0:
+        return None
+    if libc.inotify_add_watch(fd, os.fsencode(folder), _IN_MASK) < 0:
+        os.close(fd)
+        return None
+    return fd
+
+class FolderWatcher(Mapping):
+    def __init__(self, folder_or_index, poll_interval=POLL_INTERVAL):
+        if isinstance(folder_or_index, FolderIndex):
+            self.index = folder_or_index
+        else:
+            self.index = FolderIndex(folder_or_index)
+        self.folder = self.index.folder
+        self.poll_interval = poll_interval
+        self.version = 0        # bumped whenever the index may have changed
+        self.mode = None        # "inotify" or "poll" once started
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    # --- mapping (reads) ----------------------------------------------------
+
+    def __getitem__(self, lot):
+        with self._lock:
+            return self.index.lot_paths(lot)
+
+    def __iter__(self):
+        with self._lock:
+            return iter(self.index.lots())
+
+    def __len__(self):
+        with self._lock:
+            return len(self.index.lots())
+
+    def names(self):
+        """Every entry name in the folder (images or not), as a new set."""
+        with self._lock:
+            return set(self.index.names)
+
+    # --- updates ------------------------------------------------------------
+
+    def refresh(self, *paths):
+        """Re-read the given files now (after this process changed them)."""
+        with self._lock:
+            self.index.refresh(*paths)
+            self.version += 1
+
+    def rescan(self):
+        with self._lock:
+            self.index.scan()
+            self.version += 1
+
+    def start(self):
+        """Start watching in the background; returns self."""
+        if self._thread is not None:
+            return self
+        fd = _inotify_open(self.folder)
+        self.mode = "inotify" if fd is not None else "poll"
+        # Anything that changed between the index's listing and now
+        self._poll_once()
+        self._thread = threading.Thread(
+            target=self._run, args=(fd,), daemon=True,
+            name=f"watch-{os.path.basename(self.folder) or self.folder}",
+        )
+        self._thread.start()
+        print(f"[watch] {self.folder}: {self.mode}")
+        return self
+
+    def stop(self):
+        self._stop.set()
+        if self._thread is not None and self._thread is not threading.current_thread():
+            self._thread.join(timeout=2)
+        self._thread = None
+
+    def _run(self, fd):
+        try:
+            if fd is not None:
+                self._run_inotify(fd)
+                # The folder itself went away or was moved: fall back to polling
+                self.mode = "poll"
+            self._run_poll()
+        except Exception as e:
+            print(f"[watch] {self.folder}: stopped: {e}")
+
+    def _run_inotify(self, fd):
+        try:
+            while not self._stop.is_set():
+                ready, _, _ = select.select([fd], [], [], 0.5)
+                if not ready:
+                    continue
+                try:
+                    data = os.read(fd, 64 * 1024)
+                except BlockingIOError:
+                    continue
+                names, rescan = set(), False
+                offset = 0
+                while offset + _EVENT.size <= len(data):
+                    _wd, mask, _cookie, length = _EVENT.unpack_from(data, offset)
+                    offset += _EVENT.size
+                    name = data[offset:offset + length].rstrip(b"\0")
+                    offset += length
+                    if mask & _IN_RESCAN:
+                        rescan = True
+                    elif name:
+                        names.add(os.fsdecode(name))
+                if rescan:
+                    self.rescan()
+                    if not os.path.isdir(self.folder):
+                        return
+                elif names:
+                    self.refresh(*names)
+        finally:
+            os.close(fd)
+
+    def _run_poll(self):
+        while not self._stop.wait(self.poll_interval):
+            self._poll_once()
+
+    def _poll_once(self):
+        # One listing; re-read only names that appeared, vanished or changed
+        listing = {}
+        try:
+            with os.scandir(self.folder) as it:
+                for entry in it:
+                    listing[entry.name] = entry
+        except FileNotFoundError:
+            pass
+        except OSError as e:
+            print(f"[watch] {self.folder}: {e}")
+            return
+        with self._lock:
+            known = set(self.index.names)
+            records = dict(self.index.records)
+        changed = known.symmetric_difference(listing)
+        for name, rec in records.items():
+            entry = listing.get(name)
+            if entry is None:
+                continue
+            try:
+                st = entry.stat()
+            except OSError:
+                changed.add(name)
+                continue
+            if (st.st_size, st.st_mtime) != (rec.size, rec.mtime):
+                changed.add(name)
+        if changed:
+            self.refresh(*changed)
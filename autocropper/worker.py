@@ -4,42 +4,128 @@ Processes all image files in the input directory, optionally filtering out speci
 and applies automatic object detection-based cropping to each image. Progress is displayed
 in a separate window while the operation runs on a background thread to keep the GUI responsive.
 Args:
-    input_dir (str): Path to the directory containing input images (.jpg, .jpeg, .png).
+    input_dir (str or io_utils.FolderIndex): Directory containing input images
+                            (.jpg, .jpeg, .png); an index is listed only once.
     output_dir (str): Path to the directory where cropped images will be saved.
     master (tk.Tk or tk.Toplevel): The root/parent Tkinter window for progress display.
     on_done (callable): Callback function to execute when cropping completes successfully.
     skip_lots (list, optional): List of lot identifiers to exclude from processing. 
                             Defaults to None (process all lots).
+    batch_size (int, optional): Number of images passed to the model per predict call.
+                            Defaults to cropper.BATCH_SIZE.
+    decode_depth (int, optional): Max decoded images queued ahead of inference.
+    write_depth (int, optional): Max crops queued for encoding/saving.
+    jobs (int, optional): Number of worker processes. 1 (default) crops on a
+                            thread in this process; >1 hands lot-grouped shards
+                            to child processes that each load their own model.
 Returns:
     None
 Side Effects:
     - Creates a ProgressWindow displaying cropping progress
-    - Spawns a daemon thread that processes images and calls auto_crop_detected_objects()
-    - Updates global progress object during execution
+    - Spawns a daemon thread that runs pipeline.crop_folder(): a decode prefetch
+      pool, batched inference on the worker thread and a writer pool for encoding
+      (or lot-grouped child processes when jobs > 1)
+    - Updates global progress object (runtime.RunMetrics) during execution;
+      per-stage timings are shown in the window's Details pane and saved to
+      crop_metrics.json in output_dir when the run ends
     - Calls on_done callback upon successful completion
     - Hides the master window during processing and restores it if user cancels
 Notes:
     - Uses stop_event to support user cancellation of the operation
     - Images are filtered based on parse_image_name() result if skip_lots is provided
-    - Progress updates occur before each image is cropped
+    - progress.current advances as each crop is written; progress.current_file
+      names the first image of the batch being inferred
+    - The ETA is an EWMA of recent seconds-per-pixel times the pixel count of
+      the images still to crop (sizes read from file headers on a background
+      thread), refreshed every ETA_UPDATE_MS; time before the first finished
+      image (model load) is excluded
     - Gracefully handles window closure during processing
 """
 import os, threading, time
 import tkinter as tk
 from tkinter import ttk
+from PIL import Image
 from autocropper.runtime import progress, stop_event, on_root_close
-from autocropper.cropper import auto_crop_detected_objects
-from autocropper.io_utils import parse_image_name
+from autocropper.cropper import BATCH_SIZE
+from autocropper.io_utils import _folder_path
+from autocropper.pipeline import DECODE_QUEUE_DEPTH, WRITE_QUEUE_DEPTH, list_image_files, crop_folder
+
+# ETA refresh cadence (ms) and EWMA weight given to the newest rate sample
+ETA_UPDATE_MS = 1000
+ETA_ALPHA = 0.2
+
+class EtaEstimator:
+    """
+    Remaining-time estimate weighted by image size. Only reads
+    progress.current from the GUI thread; the worker is never touched.
+    Completion order is taken to follow ``paths`` (exact for jobs=1, close
+    enough with lot-sharded processes).
+    """
+    def __init__(self, paths, alpha=ETA_ALPHA):
+        self.paths = list(paths)
+        self.pixels = [None] * len(self.paths)   # filled in by _read_sizes
+        self.alpha = alpha
+        self.sec_per_px = None
+        self._last_done = 0
+        self._last_t = None
+        threading.Thread(target=self._read_sizes, name="eta-sizes", daemon=True).start()
+
+    def _read_sizes(self):
+        # Image.open only parses the header; no pixel data is decoded
+        for i, path in enumerate(self.paths):
+            if stop_event.is_set():
+                return
+            try:
+                with Image.open(path) as im:
+                    w, h = im.size
+                self.pixels[i] = w * h
+            except Exception:
+                self.pixels[i] = 0
+
+    def _pixels(self, start, stop):
+        known = [p for p in self.pixels if p]
+        fallback = sum(known) / len(known) if known else 1.0
+        return sum(p if p is not None else fallback for p in self.pixels[start:stop])
+
+    def update(self, done, now):
+        """Fold in progress since the last call; returns seconds left or None."""
+        done = min(done, len(self.paths))
+        if self._last_t is None:
+            # Start the clock at the first finished image so model load and
+            # warm-up don't count as per-image time
+            if done > 0:
+                self._last_t, self._last_done = now, done
+            return None
+        if done > self._last_done:
+            px = self._pixels(self._last_done, done)
+            if px > 0:
+                sample = (now - self._last_t) / px
+                self.sec_per_px = sample if self.sec_per_px is None else (
+                    self.alpha * sample + (1 - self.alpha) * self.sec_per_px)
+            self._last_t, self._last_done = now, done
+        if self.sec_per_px is None:
+            return None
+        return self.sec_per_px * self._pixels(done, len(self.paths))
+
+def _format_eta(seconds):
+    seconds = int(round(seconds))
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds:02d}s"
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours}h {minutes:02d}m"
 
 class ProgressWindow(tk.Toplevel):
     # Initialize and format the window
-    def __init__(self, master, total_items):
+    def __init__(self, master, total_items, paths=()):
         super().__init__(master)
         self.title("Processing...")
-        self.geometry("540x175")
+        self.geometry("540x210")
         self.resizable(False, False)
         self.total_items = total_items
-        self.start_time = time.time()
+        self.eta = EtaEstimator(paths) if paths else None
 
         self.label_status = ttk.Label(self, text="Starting cropping...")
         self.label_status.pack(pady=(10, 5))
@@ -57,8 +143,15 @@ class ProgressWindow(tk.Toplevel):
         self.label_count = ttk.Label(self, text=f"Cropped 0 of {total_items}")
         self.label_count.pack()
 
+        # Collapsible per-stage timings (runtime.progress snapshot)
+        self.details_btn = ttk.Button(self, text="Details ▸", command=self._toggle_details)
+        self.details_btn.pack(pady=(6, 0))
+        self.label_details = ttk.Label(self, text="", font="TkFixedFont", justify="left")
+        self.details_shown = False
+
         self.protocol("WM_DELETE_WINDOW", self._on_close)
         self._poll_id = self.after(100, self._poll_progress)
+        self._eta_id = self.after(ETA_UPDATE_MS, self._update_eta)
 
     # Handle close event
     def _on_close(self):
@@ -68,10 +161,54 @@ class ProgressWindow(tk.Toplevel):
             try: self.after_cancel(self._poll_id)
             except Exception: pass
             self._poll_id = None
+        if self._eta_id is not None:
+            try: self.after_cancel(self._eta_id)
+            except Exception: pass
+            self._eta_id = None
         try: self.destroy()
         except tk.TclError: pass
         on_root_close(self.master)
 
+    # Show/hide the per-stage timing pane
+    def _toggle_details(self):
+        self.details_shown = not self.details_shown
+        if self.details_shown:
+            self.geometry("540x340")
+            self.details_btn.config(text="Details ▾")
+            self.label_details.pack(padx=12, pady=(6, 6), anchor="w")
+            self._update_details()
+        else:
+            self.label_details.pack_forget()
+            self.details_btn.config(text="Details ▸")
+            self.geometry("540x210")
+
+    def _update_details(self):
+        snap = progress.snapshot()
+        lines = [f"{'stage':<12}{'items':>7}{'ms/item':>10}{'p95 ms':>10}{'items/s':>9}"]
+        for name in ("decode", "inference", "postprocess", "encode"):
+            st = snap["stages"].get(name)
+            if st:
+                lines.append(f"{name:<12}{st['items']:>7}{st['ms_per_item']:>10.1f}"
+                             f"{st['p95_ms']:>10.1f}{st['recent_items_per_sec']:>9.2f}")
+        queues = ", ".join(f"{k} {v}" for k, v in sorted(snap["queues"].items())) or "-"
+        lines.append(f"queued: {queues}")
+        lines.append(f"rate: {snap['recent_images_per_sec']:.2f} img/s recent, "
+                     f"{snap['images_per_sec']:.2f} overall")
+        self.label_details.config(text="\n".join(lines))
+
+    # Refresh the ETA on its own fixed cadence
+    def _update_eta(self):
+        self._eta_id = None
+        if self.eta is None or not progress.running or stop_event.is_set():
+            return
+        try:
+            remain = self.eta.update(progress.current, time.monotonic())
+            text = "Calculating..." if remain is None else _format_eta(remain)
+            self.label_eta.config(text=f"Estimated time remaining: {text}")
+            self._eta_id = self.after(ETA_UPDATE_MS, self._update_eta)
+        except tk.TclError:
+            return
+
     # Update the poll window independent of callbacks
     def _poll_progress(self):
         if not self.winfo_exists():
@@ -81,15 +218,13 @@ class ProgressWindow(tk.Toplevel):
             self.progress['value'] = cur
             self.label_count.config(text=f"Cropped {cur} of {self.total_items}")
 
-            elapsed = max(0.001, time.time() - self.start_time)
-            rate = cur / elapsed
-            remain = int((self.total_items - cur) / rate) if rate > 0 else 0
-            self.label_eta.config(text=f"Estimated time remaining: {remain}s")
-
             if progress.current_file:
                 self.label_status.config(text=f"Cropping: {os.path.basename(progress.current_file)}")
             else:
                 self.label_status.config(text="Cropping in progress...")
+
+            if self.details_shown:
+                self._update_details()
         except tk.TclError:
             return
 
@@ -102,52 +237,27 @@ class ProgressWindow(tk.Toplevel):
             except tk.TclError:
                 pass
 
-def run_cropper(input_dir, output_dir, master, on_done, skip_lots=None):
+def run_cropper(input_dir, output_dir, master, on_done, skip_lots=None, batch_size=BATCH_SIZE,
+                decode_depth=DECODE_QUEUE_DEPTH, write_depth=WRITE_QUEUE_DEPTH, jobs=1):
     # find all images in input_dir
-    all_files = [
-        f for f in os.listdir(input_dir)
-        if f.lower().endswith((".jpg", ".jpeg", ".png"))
-    ]
-
-    if skip_lots:
-        filtered = []
-        for fname in all_files:
-            parsed = parse_image_name(fname)
-            if not parsed:
-                continue
-            lot, idx, scheme, ext = parsed
-            if lot not in skip_lots:
-                filtered.append(fname)
-        image_files = filtered
-    else:
-        image_files = all_files
-
-    progress.current = 0
-    progress.total = len(image_files)
-    progress.current_file = ""
-    progress.running = True
+    image_files = list_image_files(input_dir, skip_lots)
+
+    progress.reset(len(image_files))
 
     # Create progress bar window
-    win = ProgressWindow(master, len(image_files))
+    win = ProgressWindow(master, len(image_files),
+                         [os.path.join(_folder_path(input_dir), f) for f in image_files])
 
     # Define cropping loop to be called on another thread
     # that isn't clogged with the GUI
     def crop_loop():
-        for filename in image_files:
-            if stop_event.is_set():
-                break
-            src = os.path.join(input_dir, filename)
-            dst = os.path.join(output_dir, filename)
-            # Update progress bar before cropping
-            progress.current_file = src
-            # Crop
-            auto_crop_detected_objects(src, dst)
-            # Inc cropped objects
-            progress.current += 1
-            if stop_event.is_set():
-                break
-
-        progress.running = False
+        crop_folder(
+            input_dir, output_dir, image_files,
+            batch_size=batch_size,
+            decode_depth=decode_depth,
+            write_depth=write_depth,
+            jobs=jobs,
+        )
 
         # Finish UI on main thread
         def finish_ui():
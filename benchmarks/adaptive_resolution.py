@@ -0,0 +1,98 @@
+"""
+Coarse-to-fine detection vs. the fixed imgsz=4800 path.
+
+For every image in a folder, computes the crop box with the fixed
+high-resolution pass and with the adaptive path (cropper.detect_boxes with
+ADAPTIVE_RESOLUTION on), then reports seconds/image for both, how often the
+adaptive path escalated, and the IoU between the two crop boxes.
+
+Usage (from the repository root):
+    python -m benchmarks.adaptive_resolution --images DIR [--limit 50] [--coarse 1280]
+"""
+import argparse
+import os
+import time
+
+from autocropper import cropper
+from autocropper.model import get_model
+
+
+def box_iou(a, b):
+    """IoU of two (x1, y1, x2, y2) boxes; None means the whole image."""
+    if a is None and b is None:
+        return 1.0
+    if a is None or b is None:
+        return 0.0
+    ix = max(0, min(a[2], b[2]) - max(a[0], b[0]))
+    iy = max(0, min(a[3], b[3]) - max(a[1], b[1]))
+    inter = ix * iy
+    union = (a[2] - a[0]) * (a[3] - a[1]) + (b[2] - b[0]) * (b[3] - b[1]) - inter
+    return inter / union if union > 0 else 0.0
+
+
+class CountingModel:
+    """Wraps the model to count predict calls (2 per image = escalated)."""
+    def __init__(self, model):
+        self.model = model
+        self.calls = 0
+
+    def predict(self, *args, **kwargs):
+        self.calls += 1
+        return self.model.predict(*args, **kwargs)
+
+
+def timed_box(model, image, path, adaptive):
+    cropper.ADAPTIVE_RESOLUTION = adaptive
+    t0 = time.perf_counter()
+    boxes = cropper.detect_boxes(model, [image])[0]
+    box = cropper.compute_crop_box(image, boxes, path)
+    return box, time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--images", required=True, help="folder of .jpg/.png lot images")
+    ap.add_argument("--limit", type=int, default=50, help="max images to measure")
+    ap.add_argument("--coarse", type=int, default=cropper.COARSE_IMGSZ, help="coarse imgsz")
+    args = ap.parse_args()
+
+    files = sorted(
+        f for f in os.listdir(args.images)
+        if f.lower().endswith((".jpg", ".jpeg", ".png"))
+    )[:args.limit]
+    if not files:
+        raise SystemExit(f"No images found in {args.images}")
+
+    cropper.COARSE_IMGSZ = args.coarse
+    model = CountingModel(get_model())
+    fixed_s = adaptive_s = 0.0
+    escalated = 0
+    ious = []
+
+    for f in files:
+        path = os.path.join(args.images, f)
+        image = cropper.decode_image(path)
+        if image is None:
+            continue
+        fixed_box, dt_fixed = timed_box(model, image, path, adaptive=False)
+        calls = model.calls
+        adaptive_box, dt_adaptive = timed_box(model, image, path, adaptive=True)
+        escalated += model.calls - calls > 1
+        fixed_s += dt_fixed
+        adaptive_s += dt_adaptive
+        ious.append(box_iou(fixed_box, adaptive_box))
+
+    n = len(ious)
+    if not n:
+        raise SystemExit("No readable images.")
+    ious.sort()
+    print(f"images:                {n}")
+    print(f"fixed    s/image:      {fixed_s / n:.3f}")
+    print(f"adaptive s/image:      {adaptive_s / n:.3f}  ({fixed_s / max(adaptive_s, 1e-9):.2f}x)")
+    print(f"escalated to full res: {escalated} / {n}")
+    print(f"crop IoU mean / min:   {sum(ious) / n:.3f} / {ious[0]:.3f}")
+    print(f"crop IoU < 0.95:       {sum(i < 0.95 for i in ious)}")
+
+
+if __name__ == "__main__":
+    main()
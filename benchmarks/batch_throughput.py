@@ -0,0 +1,53 @@
+"""
+Throughput of auto_crop_batch() for different batch sizes.
+
+Runs the real model (autocropper.model.get_model) over a folder of lot images
+once per batch size and prints images/sec, so the effect of batching on CPU
+and GPU boxes can be compared directly.
+
+Usage (from the repository root):
+    python -m benchmarks.batch_throughput --images DIR [--sizes 1,2,4,8] [--limit 64]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+from autocropper import cropper
+from autocropper.cropper import auto_crop_batch
+from autocropper.model import get_model
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--images", required=True, help="folder of .jpg/.png lot images")
+    ap.add_argument("--sizes", default="1,2,4,8", help="comma separated batch sizes")
+    ap.add_argument("--limit", type=int, default=64, help="max images per run")
+    args = ap.parse_args()
+
+    files = sorted(
+        f for f in os.listdir(args.images)
+        if f.lower().endswith((".jpg", ".jpeg", ".png"))
+    )[:args.limit]
+    if not files:
+        raise SystemExit(f"No images found in {args.images}")
+
+    # Every batch size writes to the same folder: without this, sizes after
+    # the first would be served from the detection cache
+    cropper.USE_DETECTION_CACHE = False
+
+    # Load once so model start-up is not charged to the first batch size
+    get_model()
+
+    print(f"{'batch':>5}  {'images':>6}  {'seconds':>8}  {'img/s':>7}")
+    with tempfile.TemporaryDirectory() as out_dir:
+        pairs = [(os.path.join(args.images, f), os.path.join(out_dir, f)) for f in files]
+        for size in (int(s) for s in args.sizes.split(",") if s.strip()):
+            t0 = time.perf_counter()
+            auto_crop_batch(pairs, batch_size=size)
+            dt = time.perf_counter() - t0
+            print(f"{size:>5}  {len(pairs):>6}  {dt:>8.2f}  {len(pairs) / dt:>7.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,217 @@
+"""
+End-to-end throughput of the crop pipeline with a stand-in detector.
+
+Generates a synthetic AuctionFlex-style export (lots named in every scheme
+parse_image_name accepts: bare, "lot (n)", "lot_n", "lot-n"; jpg/jpeg/png;
+lot suffixes like 12a), installs a deterministic fake model through
+autocropper.model.set_model, and runs pipeline.crop_folder over it. Reports
+images/sec, p50/p95 latency per stage (decode, inference, postprocess,
+encode; per call, so per batch for inference/postprocess) taken from the
+run's metrics, and peak RSS, so performance changes can be measured on a
+plain Linux box without the YOLO weights or a GPU. --trace-memory also
+reports the peak of image buffers allocated during the crop run itself
+(tracemalloc; slower), e.g. to compare against --full-decode.
+
+The fake model sleeps --infer-ms per image at imgsz=4800, scaled by
+(imgsz/4800)^2, so coarse-to-fine detection is reflected in the numbers.
+
+Usage (from the repository root):
+    python -m benchmarks.crop_pipeline [--lots 20] [--per-lot 4] [--size 4000x3000]
+                                       [--infer-ms 150] [--batch-size 4] [--workdir DIR]
+                                       [--full-decode] [--trace-memory]
+"""
+import argparse
+import contextlib
+import io
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+from types import SimpleNamespace
+
+import cv2
+import numpy as np
+
+from autocropper import cropper, pipeline
+from autocropper.io_utils import parse_image_name
+from autocropper.model import set_model
+from autocropper.runtime import progress
+
+SCHEMES = ("paren", "under", "hyphen", "bare")
+EXTS = ("jpg", "jpeg", "png")
+
+
+# ---------------------------------------------------------------------------
+# Stand-in detector
+# ---------------------------------------------------------------------------
+
+class _Tensor:
+    def __init__(self, array):
+        self.array = array
+
+    def cpu(self):
+        return self
+
+    def numpy(self):
+        return self.array
+
+
+class _Boxes:
+    def __init__(self, xyxy):
+        self.xyxy = _Tensor(xyxy)
+
+    def __len__(self):
+        return len(self.xyxy.array)
+
+
+class StandInDetector:
+    """Deterministic YOLO look-alike: boxes derived from the image itself."""
+
+    def __init__(self, infer_ms=150.0, n_boxes=40):
+        self.infer_ms = infer_ms
+        self.n_boxes = n_boxes
+        self._lock = threading.Lock()   # one "GPU": predict calls serialize
+
+    def _boxes_for(self, image):
+        h, w = image.shape[:2]
+        seed = int(image[h // 2, w // 2].sum()) * 1_000_003 + h * 7919 + w
+        rng = np.random.default_rng(seed)
+        # A cluster of objects in the middle of the frame plus scattered specks
+        cx, cy = w * rng.uniform(0.4, 0.6), h * rng.uniform(0.4, 0.6)
+        xy = np.column_stack([rng.normal(cx, w * 0.12, self.n_boxes),
+                              rng.normal(cy, h * 0.12, self.n_boxes)])
+        wh = np.column_stack([rng.uniform(0.01, 0.2, self.n_boxes) * w,
+                              rng.uniform(0.01, 0.2, self.n_boxes) * h])
+        x1y1 = np.clip(xy - wh / 2, 0, [w, h])
+        x2y2 = np.clip(xy + wh / 2, 0, [w, h])
+        conf = rng.uniform(0.002, 0.9, (self.n_boxes, 1))
+        cls = np.zeros((self.n_boxes, 1))
+        return np.hstack([x1y1, x2y2, conf, cls]).astype(np.float32)
+
+    def predict(self, sources, imgsz=4800, **_kwargs):
+        with self._lock:
+            time.sleep(len(sources) * self.infer_ms / 1000.0 * (imgsz / 4800.0) ** 2)
+            return [SimpleNamespace(boxes=_Boxes(self._boxes_for(im))) for im in sources]
+
+
+# ---------------------------------------------------------------------------
+# Synthetic export folder
+# ---------------------------------------------------------------------------
+
+def _lot_ids(n):
+    # 1, 2, 3, 4, 4a, 6, ... (suffixed lots exercise the 4 vs 4a distinction)
+    return [str(i) if i % 5 else f"{i - 1}a" for i in range(1, n + 1)]
+
+
+def _file_names(lot, scheme, per_lot, ext):
+    if scheme == "bare":
+        # AuctionFlex style: first image bare, the rest indexed from 2
+        return [f"{lot}.{ext}"] + [f"{lot} ({i}).{ext}" for i in range(2, per_lot + 1)]
+    if scheme == "paren":
+        return [f"{lot} ({i}).{ext}" for i in range(1, per_lot + 1)]
+    if scheme == "under":
+        return [f"{lot}_{i}.{ext}" for i in range(1, per_lot + 1)]
+    return [f"{lot}-{i}.{ext}" for i in range(1, per_lot + 1)]
+
+
+def _synthetic_image(w, h, rng):
+    # Smooth backdrop plus a few solid "objects" and mild sensor noise, so
+    # JPEG decode/encode costs are close to real catalog photos
+    gx = np.linspace(180, 240, w, dtype=np.float32)
+    gy = np.linspace(0, 25, h, dtype=np.float32)[:, None]
+    img = np.repeat((gx[None, :] - gy)[:, :, None], 3, axis=2)
+    for _ in range(rng.integers(2, 6)):
+        x1, y1 = int(rng.uniform(0.2, 0.6) * w), int(rng.uniform(0.2, 0.6) * h)
+        x2, y2 = x1 + int(rng.uniform(0.05, 0.3) * w), y1 + int(rng.uniform(0.05, 0.3) * h)
+        img[y1:y2, x1:x2] = rng.uniform(0, 255, 3)
+    img += rng.normal(0, 4, img.shape).astype(np.float32)
+    return np.clip(img, 0, 255).astype(np.uint8)
+
+
+def make_export(folder, lots, per_lot, size, seed=0):
+    """Write the synthetic export; returns the list of basenames."""
+    rng = np.random.default_rng(seed)
+    w, h = size
+    names = []
+    for i, lot in enumerate(_lot_ids(lots)):
+        scheme, ext = SCHEMES[i % len(SCHEMES)], EXTS[i % len(EXTS)]
+        for name in _file_names(lot, scheme, per_lot, ext):
+            assert parse_image_name(name), name
+            # Alternate orientation so batches mix image shapes
+            shape = (w, h) if rng.random() < 0.7 else (h, w)
+            cv2.imwrite(os.path.join(folder, name), _synthetic_image(*shape, rng))
+            names.append(name)
+    return names
+
+
+def _peak_rss_mib():
+    # ru_maxrss is KiB on Linux, bytes on macOS
+    rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return rss / (2**20 if sys.platform == "darwin" else 2**10)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--lots", type=int, default=20)
+    ap.add_argument("--per-lot", type=int, default=4)
+    ap.add_argument("--size", default="4000x3000", help="WxH of generated images")
+    ap.add_argument("--infer-ms", type=float, default=150.0, help="fake inference ms/image at imgsz 4800")
+    ap.add_argument("--batch-size", type=int, default=cropper.BATCH_SIZE)
+    ap.add_argument("--decode-depth", type=int, default=pipeline.DECODE_QUEUE_DEPTH)
+    ap.add_argument("--write-depth", type=int, default=pipeline.WRITE_QUEUE_DEPTH)
+    ap.add_argument("--workdir", help="reuse/keep generated images here instead of a temp dir")
+    ap.add_argument("--full-decode", action="store_true", help="disable reduced JPEG decoding for detection")
+    ap.add_argument("--trace-memory", action="store_true", help="report peak traced allocations of the run")
+    args = ap.parse_args()
+    size = tuple(int(v) for v in args.size.lower().split("x"))
+
+    with tempfile.TemporaryDirectory() as tmp:
+        root = args.workdir or tmp
+        in_dir, out_dir = os.path.join(root, "export"), os.path.join(root, "Cropped_export")
+        os.makedirs(in_dir, exist_ok=True)
+        os.makedirs(out_dir, exist_ok=True)
+
+        names = pipeline.list_image_files(in_dir)
+        if not names:
+            t0 = time.perf_counter()
+            names = make_export(in_dir, args.lots, args.per_lot, size)
+            print(f"generated {len(names)} images ({args.size}) in {time.perf_counter() - t0:.1f}s")
+
+        # Measure the pipeline itself, not cache hits from a previous run
+        cropper.USE_DETECTION_CACHE = False
+        cropper.REDUCED_DECODE = not args.full_decode
+        set_model(StandInDetector(args.infer_ms))
+        if args.trace_memory:
+            tracemalloc.start()
+        t0 = time.perf_counter()
+        with contextlib.redirect_stdout(io.StringIO()):   # per-image cropper logs
+            pipeline.crop_folder(
+                in_dir, out_dir, names,
+                batch_size=args.batch_size,
+                decode_depth=args.decode_depth,
+                write_depth=args.write_depth,
+            )
+        wall = time.perf_counter() - t0
+        traced_peak = tracemalloc.get_traced_memory()[1] if args.trace_memory else None
+        tracemalloc.stop()
+
+    print()
+    print(f"images:      {len(names)}  (batch {args.batch_size}, "
+          f"decode depth {args.decode_depth}, write depth {args.write_depth})")
+    print(f"wall time:   {wall:.2f} s")
+    print(f"throughput:  {len(names) / wall:.2f} images/s")
+    print(f"peak RSS:    {_peak_rss_mib():.0f} MiB")
+    if traced_peak is not None:
+        print(f"peak traced: {traced_peak / 2**20:.0f} MiB during the crop run")
+    print()
+    # Stage timings come from the run's metrics (runtime.progress)
+    print(f"{'stage':<14}{'calls':>6}{'items':>7}{'p50 ms':>10}{'p95 ms':>10}{'ms/item':>10}{'total s':>10}")
+    for stage, st in progress.snapshot()["stages"].items():
+        print(f"{stage:<14}{st['calls']:>6}{st['items']:>7}{st['p50_ms']:>10.1f}"
+              f"{st['p95_ms']:>10.1f}{st['ms_per_item']:>10.1f}{st['seconds']:>10.2f}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,53 @@
+"""
+Cost of the second JPEG decode removed from auto_crop_detected_objects.
+
+Before, the cropper decoded each image with cv2.imread and the model decoded
+the same file again from its path. This measures, per image, the time and
+memory of that extra decode (what handing the array to predict() saves).
+No model is needed.
+
+Usage (from the repository root):
+    python -m benchmarks.decode_once --images DIR [--limit 50]
+"""
+import argparse
+import os
+import time
+
+import cv2
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--images", required=True, help="folder of .jpg/.png lot images")
+    ap.add_argument("--limit", type=int, default=50, help="max images to measure")
+    args = ap.parse_args()
+
+    files = sorted(
+        f for f in os.listdir(args.images)
+        if f.lower().endswith((".jpg", ".jpeg", ".png"))
+    )[:args.limit]
+    if not files:
+        raise SystemExit(f"No images found in {args.images}")
+
+    total_s = 0.0
+    peak_bytes = 0
+    total_bytes = 0
+    for f in files:
+        t0 = time.perf_counter()
+        image = cv2.imread(os.path.join(args.images, f))
+        total_s += time.perf_counter() - t0
+        if image is None:
+            continue
+        total_bytes += image.nbytes
+        peak_bytes = max(peak_bytes, image.nbytes)
+
+    n = len(files)
+    print(f"images measured:            {n}")
+    print(f"decode time saved / image:  {total_s / n * 1000:.1f} ms")
+    print(f"decode time saved / run:    {total_s:.2f} s")
+    print(f"duplicate array / image:    {total_bytes / n / 2**20:.1f} MiB avg, "
+          f"{peak_bytes / 2**20:.1f} MiB max")
+
+
+if __name__ == "__main__":
+    main()
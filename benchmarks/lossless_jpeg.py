@@ -0,0 +1,116 @@
+"""
+Lossless (jpegtran) JPEG crop/rotate vs. the decode + re-encode path.
+
+Generates synthetic JPEGs and times, per image:
+  - crop:   cv2.imread + slice + cv2.imwrite   vs. lossless.crop_jpeg
+  - rotate: PIL rotate + save (review window)  vs. lossless.rotate_jpeg
+and reports how far four 90-degree rotations drift from the original (PSNR;
+the lossless path must come back bit-identical). Needs jpegtran on PATH or
+next to the package for the lossless columns.
+
+Usage (from the repository root):
+    python -m benchmarks.lossless_jpeg [--images 10] [--size 6000x4000]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import cv2
+import numpy as np
+from PIL import Image
+
+from autocropper import lossless
+
+
+def _synthetic_jpeg(path, w, h, rng):
+    gx = np.linspace(150, 230, w, dtype=np.float32)
+    img = np.repeat(np.repeat(gx[None, :, None], h, axis=0), 3, axis=2)
+    img += rng.normal(0, 6, img.shape).astype(np.float32)
+    cv2.imwrite(path, np.clip(img, 0, 255).astype(np.uint8))
+
+
+def _psnr(a, b):
+    if a.shape != b.shape:
+        return float("nan")
+    mse = np.mean((a.astype(np.float64) - b.astype(np.float64)) ** 2)
+    return float("inf") if mse == 0 else 10 * np.log10(255.0 ** 2 / mse)
+
+
+def _time_each(fn, items):
+    t0 = time.perf_counter()
+    for item in items:
+        fn(item)
+    return (time.perf_counter() - t0) / len(items) * 1000
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--images", type=int, default=10)
+    ap.add_argument("--size", default="6000x4000", help="WxH of generated images")
+    args = ap.parse_args()
+    w, h = (int(v) for v in args.size.lower().split("x"))
+    # Central crop like a typical auto-crop; rotate tests use an MCU-aligned size
+    box = (int(w * 0.2) + 3, int(h * 0.15) + 5, int(w * 0.8) - 7, int(h * 0.9) - 1)
+
+    jpegtran = lossless.find_jpegtran()
+    print(f"jpegtran: {jpegtran or 'not found (lossless columns skipped)'}")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        rng = np.random.default_rng(0)
+        srcs = [os.path.join(tmp, f"src{i}.jpg") for i in range(args.images)]
+        for p in srcs:
+            _synthetic_jpeg(p, w, h, rng)
+
+        def reencode_crop(src):
+            x1, y1, x2, y2 = box
+            cv2.imwrite(src + ".reenc.jpg", cv2.imread(src)[y1:y2, x1:x2])
+
+        def lossless_crop(src):
+            assert lossless.crop_jpeg(src, src + ".lossless.jpg", box)
+
+        def pil_rotate(path):
+            Image.open(path).rotate(-90, expand=True).save(path)
+
+        def jpegtran_rotate(path):
+            assert lossless.rotate_jpeg(path, 90)
+
+        print(f"\n{args.images} images, {w}x{h}, crop box {box}")
+        print(f"{'operation':<10}{'re-encode ms':>14}{'lossless ms':>14}")
+        crop_re = _time_each(reencode_crop, srcs)
+        crop_ll = _time_each(lossless_crop, srcs) if jpegtran else None
+
+        # Rotation inputs: the MCU-aligned lossless crops when available
+        rot_srcs = [p + (".lossless.jpg" if jpegtran else ".reenc.jpg") for p in srcs]
+        originals = [cv2.imread(p) for p in rot_srcs]
+        pil_copies, jt_copies = [], []
+        for p in rot_srcs:
+            for suffix, copies in ((".pil.jpg", pil_copies), (".jt.jpg", jt_copies)):
+                with open(p, "rb") as f_in, open(p + suffix, "wb") as f_out:
+                    f_out.write(f_in.read())
+                copies.append(p + suffix)
+        rot_re = _time_each(pil_rotate, pil_copies)
+        rot_ll = _time_each(jpegtran_rotate, jt_copies) if jpegtran else None
+
+        fmt = lambda v: f"{v:>14.1f}" if v is not None else f"{'-':>14}"
+        print(f"{'crop':<10}{crop_re:>14.1f}{fmt(crop_ll)}")
+        print(f"{'rotate':<10}{rot_re:>14.1f}{fmt(rot_ll)}")
+
+        # Three more quarter turns: back to the original orientation
+        for _ in range(3):
+            for p in pil_copies:
+                pil_rotate(p)
+            if jpegtran:
+                for p in jt_copies:
+                    jpegtran_rotate(p)
+        psnr_re = np.mean([_psnr(o, cv2.imread(p)) for o, p in zip(originals, pil_copies)])
+        print(f"\nafter 4 x 90 deg rotations, PSNR vs original: re-encode {psnr_re:.1f} dB", end="")
+        if jpegtran:
+            exact = all(np.array_equal(o, cv2.imread(p)) for o, p in zip(originals, jt_copies))
+            print(f", lossless {'identical' if exact else 'CHANGED'}")
+        else:
+            print()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,118 @@
+"""
+Single-regex, memoized parse_image_name vs. the original four-regex parser.
+
+Generates synthetic lot file names in every naming scheme (plus names that
+must not parse), checks that io_utils.parse_image_name agrees with the
+four-regex version it replaced, and times both over the whole list: once on
+a cold cache (every name new) and then on repeat calls, which is how the
+GUI uses it (sorting, scheme detection, rename plans, display order). No
+files are touched.
+
+Usage (from the repository root):
+    python -m benchmarks.parse_names [--names 100000] [--repeats 3]
+"""
+import argparse
+import os
+import random
+import re
+import time
+
+from autocropper import io_utils
+
+_LOT = r"(?P<lot>\d+[A-Za-z]*)"
+_EXT = r"(?P<ext>jpe?g|png)"
+_IDX = r"(?P<idx>\d+)"
+_PAREN_IDX = re.compile(rf"^{_LOT}\s*\(({_IDX})\)\.({_EXT})$", re.IGNORECASE)
+_UNDER_IDX = re.compile(rf"^{_LOT}\s*_{_IDX}\.({_EXT})$", re.IGNORECASE)
+_HYPH_IDX  = re.compile(rf"^{_LOT}\s*-{_IDX}\.({_EXT})$", re.IGNORECASE)
+_BARE      = re.compile(rf"^{_LOT}\.({_EXT})$", re.IGNORECASE)
+
+
+def four_regex_parse(path_or_name):
+    """
+    The pre-change parser, kept here as the reference. The original returned
+    m.group(3) -- the index digits -- as the extension of "lot (n).ext"
+    names; the reference reads the named ext group instead.
+    """
+    name = os.path.basename(path_or_name)
+    m = _PAREN_IDX.match(name)
+    if m:
+        return m.group("lot"), int(m.group("idx")), "paren", m.group("ext").lower()
+    m = _UNDER_IDX.match(name)
+    if m:
+        return m.group("lot"), int(m.group("idx")), "under", m.group(3).lower()
+    m = _HYPH_IDX.match(name)
+    if m:
+        return m.group("lot"), int(m.group("idx")), "hyphen", m.group(3).lower()
+    m = _BARE.match(name)
+    if m:
+        return m.group("lot"), 0, "bare", m.group(2).lower()
+    return None
+
+
+def synthetic_names(n, rng):
+    names = []
+    for i in range(n):
+        lot = f"{i // 8 + 1}{rng.choice(['', '', '', 'a', 'B'])}"
+        idx = i % 8 + 1
+        ext = rng.choice(["jpg", "JPG", "jpeg", "png"])
+        form = rng.random()
+        if form < 0.1:
+            name = f"{lot}.{ext}"
+        elif form < 0.55:
+            name = f"{lot} ({idx}).{ext}"
+        elif form < 0.8:
+            name = f"{lot}_{idx}.{ext}"
+        elif form < 0.9:
+            name = f"{lot}-{idx}.{ext}"
+        else:
+            name = rng.choice([f"IMG_{i:05d}.jpg", f"{lot} ({idx}).tif", f"notes_{i}.txt", f"{lot} copy.jpg"])
+        names.append(os.path.join("Z:\\auctionflex\\AuctionExport_161" if i % 2 else "/sales/161", name))
+    return names
+
+
+def _time(fn, names):
+    t0 = time.perf_counter()
+    for p in names:
+        fn(p)
+    return time.perf_counter() - t0
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--names", type=int, default=100000)
+    ap.add_argument("--repeats", type=int, default=3, help="passes over the names after the first")
+    args = ap.parse_args()
+
+    names = synthetic_names(args.names, random.Random(0))
+    expected = [four_regex_parse(p) for p in names]
+
+    io_utils.parse_image_name.cache_clear()
+    assert [io_utils.parse_image_name(p) for p in names] == expected, "parsers disagree"
+
+    # More distinct names than the cache holds would only measure eviction
+    cached = min(args.names, io_utils.PARSE_CACHE_SIZE)
+    t_old = _time(four_regex_parse, names)
+    io_utils.parse_image_name.cache_clear()
+    t_cold = _time(io_utils.parse_image_name, names)
+    t_uncached = _time(io_utils.parse_image_name.__wrapped__, names)
+    warm = names[:cached]
+    io_utils.parse_image_name.cache_clear()
+    _time(io_utils.parse_image_name, warm)
+    t_old_warm = sum(_time(four_regex_parse, warm) for _ in range(args.repeats))
+    t_warm = sum(_time(io_utils.parse_image_name, warm) for _ in range(args.repeats))
+
+    n = len(names)
+    n_warm = len(warm) * args.repeats
+    unparsed = sum(e is None for e in expected)
+    print(f"names: {n} ({unparsed} not images), results identical")
+    print(f"four regexes:              {t_old / n * 1e9:7.0f} ns/name")
+    print(f"one regex, no cache:       {t_uncached / n * 1e9:7.0f} ns/name  ({t_old / t_uncached:.1f}x)")
+    print(f"one regex, cold cache:     {t_cold / n * 1e9:7.0f} ns/name  ({t_old / t_cold:.1f}x)")
+    print(f"repeat calls ({cached} names x {args.repeats}):")
+    print(f"  four regexes:            {t_old_warm / n_warm * 1e9:7.0f} ns/name")
+    print(f"  one regex, cached:       {t_warm / n_warm * 1e9:7.0f} ns/name  ({t_old_warm / t_warm:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
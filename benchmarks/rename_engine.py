@@ -0,0 +1,154 @@
+"""
+Journaled, batched normalize_output_dir vs. the original per-lot renames.
+
+Builds two identical synthetic output folders (empty placeholder files, most
+lots needing a renumber: bare + indexed, or indexed without index 1), runs
+the original per-lot normalize on one and io_utils.normalize_output_dir on
+the other, and checks that both end with the same file names. Then it kills
+a batch at several points (by making os.replace fail partway) and checks
+that renames.recover_renames() leaves every photo under a lot name again.
+
+Usage (from the repository root):
+    python -m benchmarks.rename_engine [--files 10000]
+"""
+import argparse
+import os
+import tempfile
+import time
+from unittest import mock
+
+from autocropper import io_utils, renames
+
+
+def legacy_apply_renames(plan):
+    """The pre-journal two-phase renamer, kept here as the reference."""
+    if not plan:
+        return
+    folder = None
+    temps = {}
+    used = set()
+    for src, dst in plan.items():
+        folder = folder or os.path.dirname(src)
+        used.add(os.path.basename(src))
+        used.add(os.path.basename(dst))
+
+    def _temp_for(dst_path):
+        stem, ext = os.path.splitext(os.path.basename(dst_path))
+        k = 0
+        while True:
+            tmp = f"{stem}.__tmp__{k}{ext}"
+            if tmp not in used:
+                used.add(tmp)
+                return os.path.join(folder, tmp)
+            k += 1
+
+    for src, dst in plan.items():
+        if os.path.exists(src):
+            tmp = _temp_for(dst)
+            os.replace(src, tmp)
+            temps[tmp] = dst
+    for tmp, dst in temps.items():
+        os.replace(tmp, dst)
+
+
+def legacy_normalize(out_dir):
+    count = 0
+    for _lot, files in io_utils.group_images_by_lot(out_dir).items():
+        plan = io_utils.compute_export_renames_for_lot(files)
+        if plan:
+            legacy_apply_renames(plan)
+            count += len(plan)
+    return count
+
+
+def make_folder(path, n_files):
+    # Lots of 5 photos: "bare + (1)..(4)" (shift all), "(2)..(6)" (promote),
+    # and already-normalized "(1)..(5)", in rotation
+    os.makedirs(path)
+    lot = 0
+    names = []
+    while len(names) < n_files:
+        lot += 1
+        kind = lot % 3
+        if kind == 0:
+            names += [f"{lot}.jpg"] + [f"{lot} ({i}).jpg" for i in range(1, 5)]
+        elif kind == 1:
+            names += [f"{lot} ({i}).jpg" for i in range(2, 7)]
+        else:
+            names += [f"{lot} ({i}).jpg" for i in range(1, 6)]
+    for name in names[:n_files]:
+        open(os.path.join(path, name), "wb").close()
+
+
+def _crash_after(n_moves):
+    # Fail the (n_moves + 1)-th photo rename; journal writes pass through
+    real = os.replace
+    calls = {"n": 0}
+
+    def flaky(src, dst):
+        if os.path.basename(dst).startswith(renames.JOURNAL_FILENAME):
+            return real(src, dst)
+        calls["n"] += 1
+        if calls["n"] > n_moves:
+            raise KeyboardInterrupt("simulated crash")
+        return real(src, dst)
+    return mock.patch("autocropper.renames.os.replace", flaky)
+
+
+def main():
+    ap = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    ap.add_argument("--files", type=int, default=10000)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        old_dir, new_dir = os.path.join(tmp, "legacy"), os.path.join(tmp, "journaled")
+        make_folder(old_dir, args.files)
+        make_folder(new_dir, args.files)
+
+        t0 = time.perf_counter()
+        n_old = legacy_normalize(old_dir)
+        t_old = time.perf_counter() - t0
+
+        io_utils.parse_image_name.cache_clear()
+        t0 = time.perf_counter()
+        n_new = io_utils.normalize_output_dir(new_dir)
+        t_new = time.perf_counter() - t0
+
+        assert n_old == n_new, (n_old, n_new)
+        assert sorted(os.listdir(old_dir)) == sorted(os.listdir(new_dir)), "final names differ"
+        print(f"files: {args.files}, renamed: {n_new} (final names identical)")
+        print(f"per-lot two-phase:      {t_old * 1000:8.0f} ms")
+        print(f"batched + journaled:    {t_new * 1000:8.0f} ms  ({t_old / t_new:.2f}x)")
+
+        # Crash at the start, middle and end of phase 1 and in phase 2
+        print("\ninterrupted batch -> recover_renames():")
+        for frac in (0.0, 0.5, 0.99, 1.5):
+            crash_dir = os.path.join(tmp, f"crash{frac}")
+            make_folder(crash_dir, min(args.files, 2000))
+            expected = set(os.listdir(crash_dir))
+            plan = {}
+            for _lot, files in io_utils.group_images_by_lot(crash_dir).items():
+                plan.update(io_utils.compute_export_renames_for_lot(files))
+            with _crash_after(int(len(plan) * frac)):
+                # Simulate a dying process: no in-process cleanup runs
+                with mock.patch("autocropper.renames._finish", lambda *a, **k: 0), \
+                        mock.patch("autocropper.renames.os.remove"):
+                    try:
+                        renames.apply_renames(plan)
+                    except KeyboardInterrupt:
+                        pass
+            stranded = [n for n in os.listdir(crash_dir) if "__tmp__" in n]
+            renames.recover_renames(crash_dir)
+            final = set(os.listdir(crash_dir))
+            assert renames.JOURNAL_FILENAME not in final, "journal left behind"
+            unparsed = [n for n in final if not io_utils.parse_image_name(n)]
+            phase = "phase 1" if frac < 1 else "phase 2"
+            state = "rolled back" if final == expected else "completed"
+            print(f"  crash in {phase} after {int(len(plan) * frac):5d} moves: "
+                  f"{len(stranded):5d} temp files -> {state}, {len(unparsed)} unparsed, "
+                  f"{len(final)} files")
+            assert not unparsed and len(final) == len(expected)
+
+
+if __name__ == "__main__":
+    main()